@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# batch_solver.py
+
+# Runs the solver over every bundled level on a process pool and streams one
+# JSON line per level to the results file as soon as that level finishes.
+# Levels already solved or proven unsolvable in the results file are skipped,
+# so an interrupted run picks up where it left off and a rerun with a bigger
+# budget retries only the levels that hit a limit.
+#
+# usage: python batch_solver.py [--out results.jsonl] [--workers N]
+#                               [--timeout SECONDS] [--max-nodes N] [--levelset NAME ...]
+#                               [--bidirectional] [--memory-cap MB] [--spill-dir DIR]
+
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+from level_loader import LevelLoader
+from solver import solve_level
+
+# results that a rerun would only repeat; node_limit and time_limit are retried
+FINAL_STATUSES = ("solved", "unsolvable")
+
+def solve_job(job):
+    levelset, levelname, level_data, max_nodes, timeout, weight, bidirectional, memory_cap, spill_dir = job
+    start = time.perf_counter()
+    result = solve_level(level_data, max_nodes=max_nodes, time_limit=timeout, weight=weight,
+                         bidirectional=bidirectional, compact=memory_cap is not None,
+                         memory_cap=memory_cap, spill_dir=spill_dir)
+    solution = result.solution or ""
+    return {
+        "levelset": levelset,
+        "level": levelname,
+        "status": result.status,
+        "solution": solution,
+        "moves": len(solution),
+        "pushes": result.pushes,
+        "nodes": result.nodes,
+        "direction": result.direction,
+        "forward_nodes": result.nodes - result.backward_nodes,
+        "backward_nodes": result.backward_nodes,
+        "bytes_per_state": round(result.bytes_per_state, 1),
+        "spilled": result.spilled,
+        "wall_time": round(time.perf_counter() - start, 4),
+    }
+
+def iter_results(path: str):
+    # decoded records of a results file; blank lines and a partially written
+    # last line from an interrupted run are skipped
+    if not path or not os.path.isfile(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def load_finished(path: str) -> set:
+    finished = set()
+    for record in iter_results(path):
+        if record.get("status") in FINAL_STATUSES:
+            finished.add((record["levelset"], record["level"]))
+    return finished
+
+def end_with_newline(path: str):
+    # an interrupted run can leave a truncated last line; start appending on
+    # a fresh line so the next record is not glued onto it
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+def build_jobs(data: dict, levelsets, finished: set, max_nodes: int, timeout: float, weight: float,
+               bidirectional: bool = False, memory_cap=None, spill_dir=None):
+    jobs = []
+    for levelset in sorted(data.keys()):
+        if levelsets and levelset not in levelsets:
+            continue
+        for levelname, level_data in data[levelset].items():
+            if (levelset, levelname) in finished:
+                continue
+            jobs.append((levelset, levelname, level_data, max_nodes, timeout, weight, bidirectional,
+                         memory_cap, spill_dir))
+    return jobs
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve every bundled level on a process pool.")
+    parser.add_argument("--out", default="solver_results.jsonl", help="JSONL results file (appended to and resumed from)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-level time budget in seconds")
+    parser.add_argument("--max-nodes", type=int, default=2000000, help="per-level node budget")
+    parser.add_argument("--weight", type=float, default=1.0, help="heuristic weight (1.0 = push optimal)")
+    parser.add_argument("--levelset", action="append", default=[], help="only solve these levelsets")
+    parser.add_argument("--bidirectional", action="store_true", help="meet forward pushes with backward pulls")
+    parser.add_argument("--memory-cap", type=float, default=None,
+                        help="per-worker search memory in MB; packs the search state and spills to disk past it "
+                             "(forward search only, not with --bidirectional)")
+    parser.add_argument("--spill-dir", default=None, help="directory for spill files (default: system temp)")
+    args = parser.parse_args()
+
+    if args.memory_cap is not None and args.bidirectional:
+        parser.error("--memory-cap uses the compact forward solver and cannot be combined with --bidirectional")
+
+    loader = LevelLoader()
+    loader.load_levels()
+    data = loader.get_data()
+
+    finished = load_finished(args.out)
+    memory_cap = int(args.memory_cap * 1024 * 1024) if args.memory_cap is not None else None
+    jobs = build_jobs(data, args.levelset, finished, args.max_nodes, args.timeout, args.weight,
+                      args.bidirectional, memory_cap, args.spill_dir)
+    print("batch_solver :: {} levels to solve, {} already done, {} workers".format(
+        len(jobs), len(finished), args.workers))
+
+    solved = 0
+    start = time.perf_counter()
+    end_with_newline(args.out)
+    with open(args.out, "a") as out, Pool(args.workers) as pool:
+        # chunksize 1 keeps long levels from holding up a batch of short ones
+        for idx, record in enumerate(pool.imap_unordered(solve_job, jobs, chunksize=1), 1):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if record["status"] == "solved":
+                solved += 1
+            print("[{}/{}] {} {}: {} {} ({:.2f}s, {} nodes)".format(
+                idx, len(jobs), record["levelset"], record["level"], record["status"],
+                record["direction"], record["wall_time"], record["nodes"]))
+
+    print("batch_solver :: solved {} of {} in {:.1f}s".format(solved, len(jobs), time.perf_counter() - start))
+
+if __name__ == "__main__":
+    main()
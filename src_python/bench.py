@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# bench.py
+
+# Headless engine benchmark, no Tk needed. For every levelset it measures:
+#   new_game latency, random-walk moves/s, undo/redo storm moves/s,
+#   solution replay moves/s (when a batch_solver results file is given),
+#   is_solved calls/s and peak traced memory.
+# Workloads are seeded so two runs replay the exact same moves; results are
+# written as JSON for comparing runs.
+#
+# usage: python bench.py [--out bench.json] [--moves N] [--seed N]
+#                        [--solutions solver_results.jsonl] [--levelset NAME ...]
+
+import argparse
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from batch_solver import iter_results
+from level_loader import LevelLoader
+from sokoban_engine import SokobanEngine, lurd_to_wasd
+
+MOVE_KEYS = "wasd"
+
+def random_walk(rng, num_moves: int) -> str:
+    return "".join(rng.choice(MOVE_KEYS) for _ in range(num_moves))
+
+def load_solutions(path: str) -> dict:
+    # batch_solver results; tolerates the truncated last line of an interrupted run
+    solutions = {}
+    for record in iter_results(path):
+        if record.get("solution"):
+            solutions[(record["levelset"], record["level"])] = lurd_to_wasd(record["solution"])
+    return solutions
+
+def rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else 0.0
+
+def bench_levelset(levelset: str, levels: dict, solutions: dict, num_moves: int, seed: int) -> dict:
+    engine = SokobanEngine()
+    rng = random.Random("{}:{}".format(seed, levelset))
+
+    new_game_time = 0.0
+    walk_moves = walk_time = 0
+    storm_moves = storm_time = 0
+    replay_moves = replay_time = 0
+    solved_calls = solved_time = 0
+    replays_ok = 0
+
+    for level_name, level_data in levels.items():
+        t0 = time.perf_counter()
+        engine.new_game(level_data)
+        new_game_time += time.perf_counter() - t0
+
+        # random walk
+        walk = random_walk(rng, num_moves)
+        t0 = time.perf_counter()
+        for move in walk:
+            engine.make_move(move)
+        walk_time += time.perf_counter() - t0
+        walk_moves += len(walk)
+
+        # undo/redo storm over the walk's history
+        recorded = engine.move_idx
+        t0 = time.perf_counter()
+        for _ in range(3):
+            for _ in range(recorded):
+                engine.undo_move()
+            for _ in range(recorded):
+                engine.redo_move()
+        storm_time += time.perf_counter() - t0
+        storm_moves += 6 * recorded
+
+        # is_solved in a tight loop
+        t0 = time.perf_counter()
+        for _ in range(num_moves):
+            engine.is_solved()
+        solved_time += time.perf_counter() - t0
+        solved_calls += num_moves
+
+        # solution replay
+        solution = solutions.get((levelset, level_name))
+        if solution:
+            engine.new_game(level_data)
+            t0 = time.perf_counter()
+            for move in solution:
+                engine.make_move(move)
+            replay_time += time.perf_counter() - t0
+            replay_moves += len(solution)
+            replays_ok += engine.is_solved()
+
+    return {
+        "levels": len(levels),
+        "new_game_ms": round(1000 * new_game_time / max(1, len(levels)), 4),
+        "walk_moves_per_s": rate(walk_moves, walk_time),
+        "undo_redo_moves_per_s": rate(storm_moves, storm_time),
+        "replay_moves_per_s": rate(replay_moves, replay_time),
+        "replays": replays_ok,
+        "is_solved_per_s": rate(solved_calls, solved_time),
+    }
+
+def measure_peak_memory(levels: dict, num_moves: int, seed: int) -> int:
+    # separate pass, tracemalloc would skew the timings above
+    engine = SokobanEngine()
+    rng = random.Random(seed)
+    tracemalloc.start()
+    for level_data in levels.values():
+        engine.new_game(level_data)
+        for move in random_walk(rng, num_moves):
+            engine.make_move(move)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless SokobanEngine benchmark.")
+    parser.add_argument("--out", default="bench.json", help="JSON results file")
+    parser.add_argument("--moves", type=int, default=1000, help="random-walk moves per level")
+    parser.add_argument("--seed", type=int, default=0, help="workload seed")
+    parser.add_argument("--solutions", default="", help="batch_solver JSONL results to replay")
+    parser.add_argument("--levelset", action="append", default=[], help="only bench these levelsets")
+    args = parser.parse_args()
+
+    loader = LevelLoader()
+    loader.load_levels()
+    data = loader.get_data()
+    solutions = load_solutions(args.solutions)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "moves": args.moves,
+            "seed": args.seed,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "levelsets": {},
+    }
+
+    for levelset in sorted(data.keys()):
+        if args.levelset and levelset not in args.levelset:
+            continue
+        levels = dict(data[levelset])
+        stats = bench_levelset(levelset, levels, solutions, args.moves, args.seed)
+        stats["peak_memory_bytes"] = measure_peak_memory(levels, args.moves, args.seed)
+        results["levelsets"][levelset] = stats
+        print("{:<12} new_game {:7.3f} ms  walk {:>10} mv/s  undo/redo {:>10} mv/s  is_solved {:>11}/s  peak {:>8} B".format(
+            levelset, stats["new_game_ms"], stats["walk_moves_per_s"], stats["undo_redo_moves_per_s"],
+            stats["is_solved_per_s"], stats["peak_memory_bytes"]))
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print("bench :: results written to {}".format(args.out))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# deadlocks.py
+
+# Per-level deadlock tables, built once when a level is loaded.
+#
+# * dead squares: cells a lone box can never be pushed to a goal from. Found
+#   by pulling a box backwards from every goal; any floor cell the pulls never
+#   reach is dead. Lookups are a single bytearray index.
+# * 2x2 blocks: a box that completes a 2x2 square of walls and boxes can never
+#   move again, so the level is lost unless every box in the square is on a goal.
+# * freeze: a box blocked on both axes by walls, dead squares or other frozen
+#   boxes. Only the boxes around the one that just moved are examined.
+#
+# Every rule assumes each box has to end on a goal. A level with more boxes
+# than goals can park the spare boxes anywhere, so the tables are empty for it
+# and nothing is reported as a deadlock.
+
+from collections import deque
+from typing import Callable, List, Optional
+
+HORIZONTAL = ((0, -1), (0, 1))
+VERTICAL = ((-1, 0), (1, 0))
+
+class DeadlockTable:
+    def __init__(self, board_state):
+        self.num_rows = board_state.num_rows
+        self.num_cols = board_state.num_cols
+        self.size = self.num_rows * self.num_cols
+        self.walls = board_state.walls
+        self.goals = board_state.goals
+
+        # axes[idx] = ((left, right), (up, down)), -1 off the board
+        self.axes = [((self._step(idx, 0, -1), self._step(idx, 0, 1)),
+                      (self._step(idx, -1, 0), self._step(idx, 1, 0))) for idx in range(self.size)]
+        # the four 2x2 squares containing each cell
+        self.squares = [self._squares(idx) for idx in range(self.size)]
+
+        self.exact = sum(board_state.boxes) == sum(board_state.goals)
+        self.dead = self._find_dead_squares() if self.exact else bytearray(self.size)
+
+    def _step(self, idx: int, di: int, dj: int) -> int:
+        i, j = divmod(idx, self.num_cols)
+        i += di
+        j += dj
+        if not (0 <= i < self.num_rows and 0 <= j < self.num_cols):
+            return -1
+        return i * self.num_cols + j
+
+    def _is_wall(self, idx: int) -> bool:
+        # cells off the board behave like walls
+        return idx < 0 or self.walls[idx]
+
+    def _squares(self, idx: int):
+        squares = []
+        for di in (-1, 0):
+            for dj in (-1, 0):
+                corner = self._step(idx, di, dj)
+                if corner < 0:
+                    continue
+                squares.append((corner, self._step(corner, 0, 1), self._step(corner, 1, 0), self._step(corner, 1, 1)))
+        return squares
+
+    def _find_dead_squares(self) -> bytearray:
+        live = bytearray(self.size)
+        queue = deque()
+        for idx in range(self.size):
+            if self.goals[idx]:
+                live[idx] = 1
+                queue.append(idx)
+
+        while queue:
+            cur = queue.popleft()
+            for di, dj in HORIZONTAL + VERTICAL:
+                # pull the box from cur to prev, the player backs into behind
+                prev = self._step(cur, di, dj)
+                if self._is_wall(prev) or live[prev]:
+                    continue
+                behind = self._step(prev, di, dj)
+                if self._is_wall(behind):
+                    continue
+                live[prev] = 1
+                queue.append(prev)
+
+        dead = bytearray(self.size)
+        for idx in range(self.size):
+            if not self.walls[idx] and not live[idx]:
+                dead[idx] = 1
+        return dead
+
+    def is_dead_square(self, idx: int) -> bool:
+        return bool(self.dead[idx])
+
+    def is_block_deadlock(self, idx: int, has_box: Callable[[int], bool]) -> bool:
+        for cells in self.squares[idx]:
+            if any(c >= 0 and not self.walls[c] and not has_box(c) for c in cells):
+                continue
+            if any(c >= 0 and has_box(c) and not self.goals[c] for c in cells):
+                return True
+        return False
+
+    def _frozen(self, idx: int, has_box, as_walls: set) -> Optional[List[int]]:
+        # returns the frozen boxes (idx included) or None if idx can still move
+        as_walls = as_walls | {idx}
+        frozen = [idx]
+        for a, b in self.axes[idx]:
+            if self._is_wall(a) or self._is_wall(b) or a in as_walls or b in as_walls:
+                continue
+            if self.dead[a] and self.dead[b]:
+                continue
+
+            blocked = False
+            for side in (a, b):
+                if has_box(side):
+                    chain = self._frozen(side, has_box, as_walls)
+                    if chain is not None:
+                        frozen.extend(chain)
+                        blocked = True
+                        break
+            if not blocked:
+                return None
+        return frozen
+
+    def is_freeze_deadlock(self, idx: int, has_box: Callable[[int], bool]) -> bool:
+        frozen = self._frozen(idx, has_box, set())
+        if frozen is None:
+            return False
+        return any(not self.goals[b] for b in frozen)
+
+    def is_deadlock_after_push(self, idx: int, has_box: Callable[[int], bool]) -> bool:
+        # idx is the cell the box was just pushed onto
+        if not self.exact:
+            return False
+        if self.dead[idx]:
+            return True
+        if self.is_block_deadlock(idx, has_box):
+            return True
+        return self.is_freeze_deadlock(idx, has_box)
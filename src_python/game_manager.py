@@ -1,58 +1,164 @@
 # game_manager.py 
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import filedialog
+
 from level_loader import LevelLoader
+from level_importer import LevelImporter, ImportCancelled
 from progress_manager import ProgressManager
 from settings_manager import SettingsManager
-from sokoban_engine import SokobanEngine
+from game_session import GameSession
 from image_handler import ImageHandler
+from hint_service import HintService
+from replay_player import ReplayPlayer
+from sokoban_engine import lurd_to_wasd, expand_lurd
 from main_window import MainWindow
+from level_prefetcher import LevelPrefetcher
+from startup_profiler import StartupProfiler
+from instrumentation import Timings, get_logger
+
+log = get_logger("game")
+
+TIMINGS_PATH = "timings.json"
 
 class GameManager:
-    def __init__(self, root):
+    def __init__(self, root, profile_startup=False, debug=False):
         # callback to tkinter toplevel
         self.root = root 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_quit)
+        self.profiler = StartupProfiler(profile_startup)
+
+        # move / redraw / load latency histograms, collected only with --debug
+        self.timings = Timings(debug)
+        self.overlay_visible = False
 
-        # core game logic
-        self.engine = SokobanEngine()
-        
         # persistent memory
         self.progress_manager = ProgressManager()
+
+        # core game logic; this window is one frontend of the session
+        self.session = GameSession(progress_manager=self.progress_manager)
+        self.engine = self.session.engine
+        self.session.subscribe("level_loaded", self.on_level_loaded)
+        self.session.subscribe("board_changed", self.on_board_changed)
+        self.session.subscribe("won", self.on_won)
+        self.session.subscribe("deadlock", self.on_deadlock)
+
         self.settings_manager = SettingsManager() 
         self.image_handler = ImageHandler()
-        
-        # load levels
         self.level_loader = LevelLoader()
-        self.level_loader.load_levels()
+        self.hint_service = HintService(root)
+        self.replay_player = ReplayPlayer(root, self)
+
+        # background level import state, see start_import()
+        self.import_thread = None
+        self.import_cancel = None
+        self.import_progress = (0, 0, 0)
+        self.import_result = None
+
+        # box picked by a click, waiting for a click on its target cell
+        self.selected_box = None
+
+        # parse levels and decode images off the Tk thread while the window is built
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            levels_done = pool.submit(self.load_levels_job)
+            images_done = pool.submit(self.load_images_job)
+
+            # core gui logic; level menus are filled in when first opened
+            with self.profiler.phase("menu build"):
+                self.main_window = MainWindow(root, self)
+
+            levels_done.result()
+            images_done.result()
+
         self.data = self.level_loader.get_data()
-        
-        self.last_levelname = ""
-        self.last_levelset = ""
+        self.session.data = self.data
 
-        # core gui logic
-        self.main_window = MainWindow(root, self)
+        # the next and previous levels are prepared while the current one is played
+        self.prefetcher = LevelPrefetcher(self.main_window.canvas.layout)
+        self.next_layout = None
+        self.image_handler.prewarm(self.settings_manager.get_tile_sizes())
         
         # launch the first level if possible 
-        self.seen_win = False
-        self.load_first_level() 
+        with self.profiler.phase("first draw"):
+            self.load_first_level() 
+            self.root.update_idletasks()
+        self.profiler.report()
+
+    def load_levels_job(self):
+        with self.profiler.phase("level parse"):
+            self.level_loader.load_levels()
+
+    def load_images_job(self):
+        with self.profiler.phase("image decode"):
+            self.image_handler.load_images()
 
     # level load functions --------------------------------------------------
     def load_level(self, levelset: str, levelname: str):
-        level_data: dict = self.data.get(levelset, {}).get(levelname, "")
-        
-        if not level_data:
-            print("Failed to load level_data")
-            return 
-        
-        self.last_levelset = levelset
-        self.last_levelname = levelname 
+        with self.timings.time("load"):
+            prepared = None
+            fetched = self.prefetcher.take(levelset, levelname, self.session.get_level_data(levelset, levelname))
+            if fetched is not None:
+                prepared = fetched.prepared
+                board_state = prepared.board_state
+                if fetched.tile_size == self.fitted_tile_size(board_state.num_rows, board_state.num_cols):
+                    self.next_layout = fetched.layout
+            self.session.load_level(levelset, levelname, prepared)
+            self.next_layout = None
+        self.root.after_idle(self.prefetch_neighbors)
+
+    def level_names(self, levelset: str) -> list:
+        return list(self.data.get(levelset, {}))
 
-        print("Loaded levelset \'{}\' level \'{}\'".format(levelset, levelname))
-        self.engine.new_game(level_data)
+    def prefetch_neighbors(self):
+        levelset = self.session.levelset
+        names = self.level_names(levelset)
+        if self.session.levelname not in names:
+            return
+
+        idx = names.index(self.session.levelname)
+        for neighbor in (idx + 1, idx - 1):
+            if 0 <= neighbor < len(names):
+                name = names[neighbor]
+                # the size the level will be fitted to, known from the index
+                meta = self.level_loader.get_meta(levelset, name)
+                if meta is not None:
+                    tile_size = self.fitted_tile_size(meta.rows, meta.cols)
+                else:
+                    tile_size = self.settings_manager.get_state().tile_size
+                self.prefetcher.prefetch(levelset, name, self.session.get_level_data(levelset, name), tile_size)
+
+    def fitted_tile_size(self, num_rows: int, num_cols: int) -> int:
+        width, height = self.main_window.canvas.canvas_size()
+        return self.settings_manager.tile_size_for(num_rows, num_cols, width, height)
+
+    def on_next_level(self):
+        log.debug("on_next_level")
+        self.step_level(1)
+
+    def on_prev_level(self):
+        log.debug("on_prev_level")
+        self.step_level(-1)
+
+    def step_level(self, step: int):
+        names = self.level_names(self.session.levelset)
+        if self.session.levelname not in names:
+            return
+        idx = names.index(self.session.levelname) + step
+        if 0 <= idx < len(names):
+            self.load_level(self.session.levelset, names[idx])
+
+    def on_level_loaded(self):
+        # a new level or a reset: drop per-position state and redraw everything
+        self.selected_box = None
+        self.main_window.canvas.select_cell(None)
+        self.hint_service.cancel()
+        self.replay_player.stop()
         self.on_refresh()
     
     def load_first_level(self):
         if not self.data:
-            print("No levels to load")
+            log.warning("no levels to load")
             return
 
         # first_levelset = list(self.data.keys())[0] 
@@ -61,66 +167,277 @@ class GameManager:
         self.load_level(first_levelset, first_level)
 
     def on_level_reload(self):
-        print("on_level_reset")
-        self.load_level(self.last_levelset, self.last_levelname)
+        log.debug("on_level_reload")
+        with self.timings.time("load"):
+            self.session.reset()
     
-    # TODO
-    def on_level_import(self, filepath: str):
-        print("Loading level ...")
-        pass 
+    def on_level_import(self, filepath: str = ""):
+        log.debug("on_level_import")
+        self.start_import(filepath, load_first=True)
     
-    # TODO
-    def on_levelset_import(self, path: str):
-        print("Loading levelsets ...")
-        pass
+    def on_levelset_import(self, path: str = ""):
+        log.debug("on_levelset_import")
+        self.start_import(path, load_first=False)
+
+    def on_import_cancel(self):
+        if self.import_cancel is not None:
+            self.import_cancel.set()
+
+    def start_import(self, path: str, load_first: bool):
+        if self.import_thread is not None:
+            self.root.title("Sokoban App - An import is already running")
+            return
+
+        if not path:
+            path = filedialog.askopenfilename(
+                title="Import levels",
+                filetypes=[("Sokoban levels", "*.xsb *.sok *.slc *.txt"), ("All files", "*")])
+        if not path:
+            return
+
+        self.import_cancel = threading.Event()
+        self.import_result = None
+        importer = LevelImporter(path, on_progress=self.on_import_progress, cancel_event=self.import_cancel)
+        self.import_progress = (0, importer.total, 0)
+
+        levelset = importer.levelset_name()
+        if levelset in self.data:
+            levelset += " (imported)"
+        pack_path = self.level_loader.imported_pack_path(levelset)
+
+        def worker():
+            try:
+                importer.import_levelset(pack_path, levelset)
+                # map and index the pack here, poll_import only merges it
+                pack = self.level_loader.open_pack(pack_path)
+                self.import_result = ("done", (pack_path, pack))
+            except ImportCancelled:
+                self.import_result = ("cancelled", None)
+            except Exception as e:
+                self.import_result = ("error", str(e))
+
+        self.import_thread = threading.Thread(target=worker, name="GameManager.import", daemon=True)
+        self.import_thread.start()
+        self.root.after(100, lambda: self.poll_import(load_first))
+
+    def on_import_progress(self, bytes_read: int, total: int, count: int):
+        # called on the import thread, read by poll_import on the Tk thread
+        self.import_progress = (bytes_read, total, count)
+
+    def poll_import(self, load_first: bool):
+        if self.import_result is None:
+            bytes_read, total, count = self.import_progress
+            percent = 100 * bytes_read // total if total else 0
+            self.root.title("Sokoban App - Importing ... {} levels ({}%)".format(count, percent))
+            self.root.after(100, lambda: self.poll_import(load_first))
+            return
+
+        status, detail = self.import_result
+        self.import_thread = None
+        self.import_cancel = None
+        self.on_deadlock(self.engine.is_deadlocked())
+
+        if status != "done":
+            log.warning("import %s: %s", status, detail or "")
+            self.root.title("Sokoban App - Import {}".format(status))
+            return
+
+        pack_path, pack = detail
+        for levelset in self.level_loader.add_pack(pack_path, pack):
+            self.main_window.add_levelset(levelset)
+            if load_first and self.data[levelset]:
+                self.load_level(levelset, next(iter(self.data[levelset])))
     
     # engine move functions --------------------------------------------------
     def on_make_move(self, move: str):
-        print("on_make_move: {}".format(move))
-        self.engine.make_move(move)
-        self.on_refresh()
-        self.check_is_win()
+        log.debug("on_make_move: %s", move)
+        self.hint_service.cancel()
+        self.replay_player.stop()
+        with self.timings.time("move"):
+            self.session.move(move)
 
     def on_redo_move(self):
-        print("on_redo_move")
-        self.engine.redo_move()
-        self.on_refresh()
+        log.debug("on_redo_move")
+        self.hint_service.cancel()
+        self.replay_player.stop()
+        self.session.redo()
 
     def on_undo_move(self):
-        print("on_undo_move")
-        self.engine.undo_move()
-        self.on_refresh()
+        log.debug("on_undo_move")
+        self.hint_service.cancel()
+        self.replay_player.stop()
+        self.session.undo()
+
+    def on_cell_click(self, row: int, col: int):
+        # click a floor cell to walk there, or a box and then a cell to push it
+        log.debug("on_cell_click: %d %d", row, col)
+        self.hint_service.cancel()
+        self.replay_player.stop()
+        idx = row * self.engine.num_cols + col
+
+        if self.selected_box is not None:
+            box, self.selected_box = self.selected_box, None
+            self.main_window.canvas.select_cell(None)
+            if idx == box:
+                return
+            moves = self.engine.find_push_path(box, idx)
+            if moves is None and self.engine.boxes[idx]:
+                # clicked another box: pick that one instead
+                self.selected_box = idx
+                self.main_window.canvas.select_cell(idx)
+                return
+        elif self.engine.boxes[idx]:
+            self.selected_box = idx
+            self.main_window.canvas.select_cell(idx)
+            return
+        else:
+            moves = self.engine.find_path(idx)
 
-    def check_is_win(self):
-        if self.seen_win:
+        if not moves:
             return
 
-        if not self.engine.is_solved():
+        # apply the whole path, then redraw the touched cells once
+        with self.timings.time("path"):
+            self.session.play(moves)
+
+    def on_hint(self):
+        log.debug("on_hint")
+        if self.engine.is_solved():
+            return
+
+        key = (self.session.levelset, self.session.levelname, self.engine.position_hash())
+        self.root.title("Sokoban App - Thinking ...")
+        self.hint_service.request(self.engine.get_level_data(), key,
+                                  lambda hint: self.on_hint_result(key, hint))
+
+    def on_hint_result(self, key, hint):
+        # the player may have moved while the worker was busy
+        if key != (self.session.levelset, self.session.levelname, self.engine.position_hash()):
+            return
+
+        if hint is None:
+            self.root.title("Sokoban App - No hint found")
             return
 
-        self.seen_win = True
+        # walk to the box and make the push
+        self.session.play_solution(hint)
+
+    def on_replay_solution(self, turbo=False):
+        log.debug("on_replay_solution")
+        progress = self.progress_manager.get_progress(self.session.levelset, self.session.levelname)
+        if progress is None or not progress.solution:
+            self.root.title("Sokoban App - No saved solution for this level")
+            return
+
+        # replay from the start position
+        self.load_level(self.session.levelset, self.session.levelname)
+        self.replay_player.start(lurd_to_wasd(expand_lurd(progress.solution)),
+                                 speed=self.settings_manager.replay_speed, turbo=turbo)
+
+    def on_replay_speed(self, speed: int):
+        log.debug("on_replay_speed: %d", speed)
+        self.settings_manager.on_replay_speed(speed)
+        # a replay in progress carries on at the new speed
+        if self.replay_player.is_playing():
+            self.replay_player.set_speed(speed)
+
+    def on_replay_finished(self):
+        self.session.check_state()
+
+    # session events --------------------------------------------------
+    def on_won(self):
         self.main_window.win_popup.trigger()
-        
-        # TODO - progress manager
-        pass
+        # the level menus show solved badges
+        self.main_window.refresh_level_menus()
+
+    def on_deadlock(self, deadlocked: bool):
+        # warn in the title bar; the level can only be saved by undoing
+        if deadlocked:
+            self.root.title("Sokoban App - Deadlocked! (Ctrl+Z to undo)")
+        else:
+            self.root.title("Sokoban App")
 
     # ui functions  --------------------------------------------------
     def on_zoom_in(self):
-        print("on_zoom_in")
+        log.debug("on_zoom_in")
         self.settings_manager.on_tile_increase()
         self.on_refresh()
 
     def on_zoom_out(self):
-        print("on_zoom_out")
+        log.debug("on_zoom_out")
         self.settings_manager.on_tile_decrease()
         self.on_refresh()
 
+    def on_fit_window(self):
+        log.debug("on_fit_window")
+        self.settings_manager.on_fit_window()
+        self.on_refresh()
+
+    def on_canvas_resize(self, width: int, height: int):
+        # called once a resize has settled; the canvas rebuilds only if the
+        # tile size or the number of cells in view changed
+        self.settings_manager.fit_tile_size(self.engine.num_rows, self.engine.num_cols, width, height)
+        board_state = self.engine.get_board_state()
+        setting_state = self.settings_manager.get_state()
+        self.image_handler.resize_images(setting_state.tile_size)
+        with self.timings.time("resize"):
+            self.main_window.canvas.redraw(board_state, setting_state, [])
+        self.update_overlay()
+
     def on_refresh(self):
+        # full redraw: new level or new tile size
+        self.engine.pop_dirty_cells()
+        width, height = self.main_window.canvas.canvas_size()
+        self.settings_manager.fit_tile_size(self.engine.num_rows, self.engine.num_cols, width, height)
         board_state = self.engine.get_board_state()
         setting_state = self.settings_manager.get_state()
         self.image_handler.resize_images(setting_state.tile_size)
-        self.main_window.canvas.redraw(board_state, setting_state)
+        with self.timings.time("rebuild"):
+            self.main_window.canvas.redraw(board_state, setting_state, layout=self.next_layout)
+        self.update_overlay()
+
+    def on_update(self):
+        # for callers that move the engine directly, like the replay player
+        self.on_board_changed(self.engine.pop_dirty_cells())
+
+    def on_board_changed(self, dirty_cells):
+        # incremental redraw of the cells the last moves touched
+        board_state = self.engine.get_board_state()
+        setting_state = self.settings_manager.get_state()
+        with self.timings.time("redraw"):
+            self.main_window.canvas.redraw(board_state, setting_state, dirty_cells)
+        self.update_overlay()
+
+        # a selected box that was pushed, undone or replayed away is dropped
+        if self.selected_box is not None and not self.engine.boxes[self.selected_box]:
+            self.selected_box = None
+            self.main_window.canvas.select_cell(None)
+
+    # debug functions --------------------------------------------------
+    def on_toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if not self.overlay_visible:
+            self.main_window.canvas.show_overlay(None)
+        self.update_overlay()
+
+    def update_overlay(self):
+        if not self.overlay_visible:
+            return
+        if not self.timings.enabled:
+            lines = ["timings off (start with --debug)"]
+        else:
+            lines = self.timings.summary_lines() or ["no timings yet"]
+        self.main_window.canvas.show_overlay(lines)
+
+    def on_dump_timings(self):
+        self.timings.dump_json(TIMINGS_PATH)
+        log.info("timings written to %s", TIMINGS_PATH)
+        self.root.title("Sokoban App - Timings written to {}".format(TIMINGS_PATH))
 
     def on_quit(self):
+        self.replay_player.stop()
+        self.hint_service.cancel()
+        self.prefetcher.close()
+        self.progress_manager.close()
         self.root.quit()
 
@@ -0,0 +1,169 @@
+# game_session.py
+
+# The game without a UI: the current level, the engine, win and deadlock
+# detection and progress saving. Frontends subscribe to events instead of
+# being called directly, so the same session runs under Tk, in a test or on
+# a server:
+#
+#   "level_loaded"   ()                 a level was loaded or reset
+#   "board_changed"  (dirty_cells)      moves were applied
+#   "won"            ()                 the level was solved, once per attempt
+#   "deadlock"       (deadlocked)       after every change
+#
+# run_script() replays a whole move string on a private engine and reports
+# whether it solves the level, without firing any events. It uses the
+# engine's verify_solution() fast path, and engines are kept per level so
+# validating many solutions for one level parses it only once.
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from instrumentation import get_logger
+from sokoban_engine import SokobanEngine, expand_lurd
+
+log = get_logger("session")
+
+@dataclass
+class ScriptResult:
+    valid: bool      # every move was legal
+    solved: bool
+    moves: int       # moves applied
+    pushes: int
+    error: str = ""
+
+class GameSession:
+    def __init__(self, data=None, progress_manager=None, script_cache_size=64):
+        # data is {levelset: {level_name: level_data}}; progress_manager may be
+        # None for sessions that should not record wins
+        self.data = data if data is not None else {}
+        self.progress_manager = progress_manager
+        self.engine = SokobanEngine()
+
+        self.levelset = ""
+        self.levelname = ""
+        self.seen_win = False
+
+        self.listeners = {}
+
+        # (levelset, level) -> engine for run_script, least recently used first
+        self.script_engines = OrderedDict()
+        self.script_cache_size = script_cache_size
+
+    # events --------------------------------------------------
+    def subscribe(self, event: str, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def emit(self, event: str, *args):
+        for callback in self.listeners.get(event, ()):
+            callback(*args)
+
+    # level functions --------------------------------------------------
+    def get_level_data(self, levelset: str, levelname: str) -> str:
+        return self.data.get(levelset, {}).get(levelname, "")
+
+    def load_level(self, levelset: str, levelname: str, prepared=None) -> bool:
+        # prepared: a PreparedLevel for this level, e.g. from the prefetcher
+        level_data = self.get_level_data(levelset, levelname)
+        if not level_data:
+            log.warning("failed to load level data for %r %r", levelset, levelname)
+            return False
+
+        self.levelset = levelset
+        self.levelname = levelname
+        self.seen_win = False
+
+        log.info("loaded levelset %r level %r", levelset, levelname)
+        self.engine.new_game(level_data, prepared)
+        self.emit("level_loaded")
+        self.emit("deadlock", self.engine.is_deadlocked())
+        return True
+
+    def reset(self):
+        if not self.levelset:
+            return
+        self.seen_win = False
+        self.engine.restart()
+        self.emit("level_loaded")
+        self.emit("deadlock", self.engine.is_deadlocked())
+
+    # move functions --------------------------------------------------
+    def move(self, key: str):
+        self.engine.make_move(key)
+        self.changed()
+
+    def undo(self):
+        self.engine.undo_move()
+        self.changed()
+
+    def redo(self):
+        self.engine.redo_move()
+        self.changed()
+
+    def play(self, keys: str):
+        # several engine keys (wasd) with one board_changed event
+        for key in keys:
+            self.engine.make_move(key)
+        self.changed()
+
+    def play_solution(self, moves: str) -> int:
+        # LURD, plain or run-length; returns the number of moves applied
+        applied = self.engine.play_solution(moves)
+        self.changed()
+        return applied
+
+    def changed(self):
+        self.emit("board_changed", self.engine.pop_dirty_cells())
+        self.check_state()
+
+    def check_state(self):
+        if self.is_won() and not self.seen_win:
+            self.seen_win = True
+            self.save_win()
+            self.emit("won")
+        self.emit("deadlock", self.engine.is_deadlocked())
+
+    def is_won(self) -> bool:
+        return self.engine.is_solved()
+
+    def save_win(self):
+        if self.progress_manager is None:
+            return
+        # queued for the progress writer thread, never blocks input
+        solution = self.engine.get_solution()
+        num_pushes = sum(1 for m in solution if m.isupper())
+        self.progress_manager.save_progress(self.levelset, self.levelname, len(solution), num_pushes, solution)
+
+    # batch API --------------------------------------------------
+    def run_script(self, levelset: str, levelname: str, moves: str) -> ScriptResult:
+        # moves are LURD, plain or run-length
+        engine = self.script_engine(levelset, levelname)
+        if engine is None:
+            return ScriptResult(False, False, 0, 0, "unknown level")
+
+        try:
+            lurd = expand_lurd(moves)
+        except ValueError as e:
+            return ScriptResult(False, False, 0, 0, str(e))
+
+        applied, pushes, solved = engine.verify_solution(lurd)
+        if applied < len(lurd):
+            return ScriptResult(False, False, applied, pushes,
+                                "illegal move {} at {}".format(lurd[applied], applied))
+        return ScriptResult(True, solved, applied, pushes)
+
+    def script_engine(self, levelset: str, levelname: str):
+        key = (levelset, levelname)
+        engine = self.script_engines.get(key)
+        if engine is not None:
+            self.script_engines.move_to_end(key)
+            return engine
+
+        level_data = self.get_level_data(levelset, levelname)
+        if not level_data:
+            return None
+        engine = SokobanEngine()
+        engine.new_game(level_data)
+        self.script_engines[key] = engine
+        if len(self.script_engines) > self.script_cache_size:
+            self.script_engines.popitem(last=False)
+        return engine
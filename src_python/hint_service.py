@@ -0,0 +1,104 @@
+# hint_service.py
+
+# Hints are computed by the solver in a separate process so the Tk loop keeps
+# running. The result is polled back with root.after, a request is dropped
+# (and its process terminated) as soon as the player moves, and every answer
+# is cached by position so asking again in the same position is instant. The
+# key is the exact position (engine.position_hash), not the normalized state
+# key: a hint is a walk from the player's own cell, so it goes stale as soon
+# as the player takes a step.
+
+import multiprocessing
+import queue
+
+from solver import solve_level
+
+POLL_MS = 50
+
+def next_push(solution: str) -> str:
+    # the walk up to and including the first push of a LURD solution
+    for i, move in enumerate(solution):
+        if move.isupper():
+            return solution[:i + 1]
+    return solution
+
+def hint_worker(level_data: str, max_nodes: int, time_limit: float, results):
+    result = solve_level(level_data, max_nodes=max_nodes, time_limit=time_limit)
+    results.put(next_push(result.solution) if result.solution is not None else None)
+
+class HintService:
+    def __init__(self, root, max_nodes=300000, time_limit=20.0):
+        self.root = root
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+
+        # spawn, not fork: the child must not inherit the Tk interpreter
+        self.ctx = multiprocessing.get_context("spawn")
+
+        # position hash -> LURD hint, or None when the solver found nothing
+        self.cache = {}
+
+        self.process = None
+        self.results = None
+        self.pending_key = None
+        self.on_result = None
+        self.after_id = None
+
+    def request(self, level_data: str, position_key, on_result):
+        if position_key in self.cache:
+            on_result(self.cache[position_key])
+            return
+
+        if position_key == self.pending_key:
+            # already working on this position
+            self.on_result = on_result
+            return
+
+        self.cancel()
+        self.pending_key = position_key
+        self.on_result = on_result
+        self.results = self.ctx.Queue()
+        self.process = self.ctx.Process(
+            target=hint_worker,
+            args=(level_data, self.max_nodes, self.time_limit, self.results),
+            daemon=True)
+        self.process.start()
+        self.after_id = self.root.after(POLL_MS, self.poll)
+
+    def poll(self):
+        self.after_id = None
+        try:
+            hint = self.results.get_nowait()
+        except queue.Empty:
+            if self.process.is_alive():
+                self.after_id = self.root.after(POLL_MS, self.poll)
+                return
+            # the worker exited; give its queue feeder a moment to flush
+            try:
+                hint = self.results.get(timeout=0.1)
+            except queue.Empty:
+                hint = None
+
+        key, on_result = self.pending_key, self.on_result
+        self.cache[key] = hint
+        self.reset()
+        on_result(hint)
+
+    def is_pending(self) -> bool:
+        return self.pending_key is not None
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+        self.reset()
+
+    def reset(self):
+        if self.process is not None:
+            self.process.join(timeout=0.1)
+        self.process = None
+        self.results = None
+        self.pending_key = None
+        self.on_result = None
+        self.after_id = None
@@ -1,11 +1,13 @@
 # image_handler.py 
 
+import threading
 import tkinter as tk
+from collections import OrderedDict
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 
 class ImageHandler:
-    def __init__(self):
+    def __init__(self, cache_size=64):
         self.image_name_to_path = {
             "wall": "assets/brick.png",
             "player": "assets/penguin.png",
@@ -15,18 +17,66 @@ class ImageHandler:
 
         self.pil_images = {}
         self.tk_images = {}
+        self.tile_size = 0
 
-        self.load_images()
-        self.resize_images(100)
+        # (name, tile_size) -> PhotoImage, least recently used first
+        self.cache_size = cache_size
+        self.tk_cache = OrderedDict()
+
+        # (name, tile_size) -> resized PIL image, filled by prewarm()
+        self.resized = {}
+        self.resized_lock = threading.Lock()
+
+        # load_images() is called by the owner, possibly from a worker thread
 
     def load_images(self):
         for name, path in self.image_name_to_path.items():
             pil_image = Image.open(path)
+            pil_image.load()
             self.pil_images[name] = pil_image
 
+    def prewarm(self, tile_sizes):
+        # the LANCZOS resamples run on a worker thread; PhotoImages can only be
+        # made on the Tk thread, so those are still built on first use
+        def worker():
+            for tile_size in tile_sizes:
+                for name, pil_image in self.pil_images.items():
+                    key = (name, tile_size)
+                    with self.resized_lock:
+                        if key in self.resized:
+                            continue
+                    resized = pil_image.resize( (tile_size, tile_size), Image.LANCZOS)
+                    with self.resized_lock:
+                        self.resized[key] = resized
+
+        thread = threading.Thread(target=worker, name="ImageHandler.prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def get_image(self, name: str, tile_size: int):
+        key = (name, tile_size)
+        tk_image = self.tk_cache.get(key)
+        if tk_image is not None:
+            self.tk_cache.move_to_end(key)
+            return tk_image
+
+        with self.resized_lock:
+            pil_image = self.resized.get(key)
+        if pil_image is None:
+            pil_image = self.pil_images[name].resize( (tile_size, tile_size), Image.LANCZOS)
+            with self.resized_lock:
+                self.resized[key] = pil_image
+
+        tk_image = ImageTk.PhotoImage(pil_image)
+        self.tk_cache[key] = tk_image
+        if len(self.tk_cache) > self.cache_size:
+            self.tk_cache.popitem(last=False)
+        return tk_image
+
     def resize_images(self, tile_size: int):
-        for name, pil_image in self.pil_images.items():
-            pil_image = pil_image.resize( (tile_size, tile_size), Image.LANCZOS)
-            tk_image = ImageTk.PhotoImage(pil_image)
-            self.tk_images[name] = tk_image
+        if tile_size == self.tile_size:
+            return
 
+        self.tile_size = tile_size
+        for name in self.pil_images:
+            self.tk_images[name] = self.get_image(name, tile_size)
@@ -0,0 +1,130 @@
+# instrumentation.py
+
+# Logging and latency timing for the game.
+#
+# Every subsystem logs through get_logger("engine"), get_logger("canvas"),
+# ... which are children of the "sokoban" logger, so one level controls them
+# all and a single subsystem can still be turned up on its own:
+#
+#   python main.py --log-level debug
+#   python main.py --log-level info --log canvas=debug
+#
+# Timings are only collected when enabled (--debug). A disabled Timings hands
+# out one shared no-op context, so the hot paths pay one attribute lookup and
+# an empty with block.
+
+import json
+import logging
+import time
+from contextlib import nullcontext
+
+ROOT_LOGGER = "sokoban"
+LOG_FORMAT = "%(asctime)s %(levelname)-5s %(name)s :: %(message)s"
+
+# histogram bucket upper bounds in milliseconds; the last bucket is open
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+NO_TIMING = nullcontext()
+
+def get_logger(subsystem: str) -> logging.Logger:
+    return logging.getLogger(ROOT_LOGGER + "." + subsystem)
+
+def configure_logging(level="warning", subsystems=()):
+    # subsystems is a list of "name=level" strings
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, "%H:%M:%S"))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [handler]
+    root.propagate = False
+    root.setLevel(level.upper())
+
+    for spec in subsystems:
+        name, _, sub_level = spec.partition("=")
+        get_logger(name).setLevel((sub_level or "debug").upper())
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-th sample
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        labels = ["<={}".format(b) for b in BUCKETS_MS] + [">{}".format(BUCKETS_MS[-1])]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 4),
+            "buckets_ms": dict(zip(labels, self.counts)),
+        }
+
+class Timer:
+    def __init__(self, timings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+class Timings:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+
+    def time(self, name: str):
+        # with timings.time("move"): ...
+        if not self.enabled:
+            return NO_TIMING
+        return Timer(self, name)
+
+    def record(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.add(seconds * 1000)
+
+    def summary_lines(self) -> list:
+        # short text for the debug overlay
+        lines = []
+        for name in sorted(self.histograms):
+            h = self.histograms[name]
+            lines.append("{:<7} n={:<6} p50 {:>6} ms  p95 {:>6} ms  max {:7.2f} ms".format(
+                name, h.count, h.percentile(0.5), h.percentile(0.95), h.max))
+        return lines
+
+    def to_dict(self) -> dict:
+        return {name: h.to_dict() for name, h in sorted(self.histograms.items())}
+
+    def dump_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# level_analytics.py
+
+# Corpus statistics computed with NumPy over every level at once. All levels
+# are parsed into padded (num_levels, max_rows, max_cols) boolean planes, which
+# are also packed into one bitmask per row (uint64, or Python ints for boards
+# wider than 64). The flood fills (player region, reverse-pull live squares)
+# run as shifts and ors over the whole (num_levels, max_rows) stack, and levels
+# drop out of the loop as soon as their fill stops growing.
+#
+# columns: levelset, level, rows, cols, boxes, goals, floor, boxes_reachable,
+#          goals_reachable, dead_squares, difficulty
+#
+# difficulty is log10 of the number of ways to place the boxes on live floor
+# squares, a rough size of the search space.
+#
+# usage: python level_analytics.py [--csv levels.csv] [--dedup dedup.json]
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import time
+
+import numpy as np
+
+from level_loader import LevelLoader
+from sokoban_engine import parse_level
+
+COLUMNS = ["levelset", "level", "rows", "cols", "boxes", "goals", "floor",
+           "boxes_reachable", "goals_reachable", "dead_squares", "difficulty"]
+
+class Corpus:
+    def __init__(self, data: dict):
+        self.keys = []
+        boards = []
+        for levelset in sorted(data.keys()):
+            for level_name, level_data in data[levelset].items():
+                self.keys.append((levelset, level_name))
+                boards.append(parse_level(level_data))
+
+        n = len(boards)
+        max_rows = max(bs.num_rows for bs in boards)
+        max_cols = max(bs.num_cols for bs in boards)
+
+        self.rows = np.array([bs.num_rows for bs in boards], dtype=np.int32)
+        self.cols = np.array([bs.num_cols for bs in boards], dtype=np.int32)
+        self.walls = np.zeros((n, max_rows, max_cols), dtype=bool)
+        self.goals = np.zeros((n, max_rows, max_cols), dtype=bool)
+        self.boxes = np.zeros((n, max_rows, max_cols), dtype=bool)
+        self.player = np.zeros((n, max_rows, max_cols), dtype=bool)
+        self.inside = np.zeros((n, max_rows, max_cols), dtype=bool)
+
+        for k, bs in enumerate(boards):
+            shape = (bs.num_rows, bs.num_cols)
+            self.walls[k, :bs.num_rows, :bs.num_cols] = np.frombuffer(bs.walls, dtype=np.uint8).reshape(shape)
+            self.goals[k, :bs.num_rows, :bs.num_cols] = np.frombuffer(bs.goals, dtype=np.uint8).reshape(shape)
+            self.boxes[k, :bs.num_rows, :bs.num_cols] = np.frombuffer(bs.boxes, dtype=np.uint8).reshape(shape)
+            self.inside[k, :bs.num_rows, :bs.num_cols] = True
+            if bs.player >= 0:
+                self.player[k, bs.player // bs.num_cols, bs.player % bs.num_cols] = True
+
+        # padding is treated as wall
+        self.floor = self.inside & ~self.walls
+
+        self.floor_bits = pack_rows(self.floor)
+        self.goal_bits = pack_rows(self.goals)
+        self.player_bits = pack_rows(self.player)
+
+def pack_rows(plane):
+    # (n, rows, cols) bools -> (n, rows) row bitmasks, bit j is column j
+    packed = np.packbits(plane, axis=2, bitorder="little")
+    if plane.shape[2] <= 64:
+        padded = np.zeros(packed.shape[:2] + (8,), dtype=np.uint8)
+        padded[:, :, :packed.shape[2]] = packed
+        return padded.view("<u8")[:, :, 0].copy()
+
+    rows = np.empty(packed.shape[:2], dtype=object)
+    for k in range(packed.shape[0]):
+        for y in range(packed.shape[1]):
+            rows[k, y] = int.from_bytes(packed[k, y].tobytes(), "little")
+    return rows
+
+def unpack_rows(bits, cols: int):
+    # inverse of pack_rows
+    if bits.dtype == object:
+        raw = np.array([[list(int(v).to_bytes((cols + 7) // 8, "little")) for v in level] for level in bits], dtype=np.uint8)
+    else:
+        raw = bits.astype("<u8")[:, :, None].view(np.uint8)
+    return np.unpackbits(raw, axis=2, bitorder="little", count=cols).astype(bool)
+
+def neighbor_values(bits, one):
+    # for every cell, the bit of its (east, west, south, north) neighbor
+    east = bits >> one
+    west = bits << one
+    south = np.zeros_like(bits)
+    south[:, :-1] = bits[:, 1:]
+    north = np.zeros_like(bits)
+    north[:, 1:] = bits[:, :-1]
+    return east, west, south, north
+
+def flood(seed, grow):
+    # repeats grow() until no level changes, shrinking to the levels still growing
+    result = seed.copy()
+    active = np.arange(len(seed))
+    current = seed
+    while len(active):
+        grown = grow(current, active)
+        changed = np.any(grown != current, axis=1)
+        active = active[changed]
+        current = grown[changed]
+        result[active] = current
+    return result
+
+def player_region(corpus: "Corpus"):
+    # floor the player can walk to, ignoring boxes
+    floor = corpus.floor_bits
+    one = 1 if floor.dtype == object else floor.dtype.type(1)
+
+    def grow(region, active):
+        east, west, south, north = neighbor_values(region, one)
+        return (region | east | west | south | north) & floor[active]
+
+    bits = flood(corpus.player_bits & floor, grow)
+    return unpack_rows(bits, corpus.walls.shape[2])
+
+def live_squares(corpus: "Corpus"):
+    # cells a lone box can still be pushed to a goal from, found by pulling
+    # boxes back from the goals: a box on x reaches a live x + d when the
+    # player can stand on x - d to push it
+    floor = corpus.floor_bits
+    one = 1 if floor.dtype == object else floor.dtype.type(1)
+    floor_east, floor_west, floor_south, floor_north = neighbor_values(floor, one)
+
+    def grow(live, active):
+        east, west, south, north = neighbor_values(live, one)
+        pulled = ((east & floor_west[active]) | (west & floor_east[active]) |
+                  (south & floor_north[active]) | (north & floor_south[active]))
+        return (live | pulled) & floor[active]
+
+    bits = flood(corpus.goal_bits & floor, grow)
+    return unpack_rows(bits, corpus.walls.shape[2])
+
+def log10_binomial(n: int, k: int) -> float:
+    if k < 0 or k > n:
+        return 0.0
+    return (math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)) / math.log(10)
+
+def analyze(corpus: "Corpus", region) -> dict:
+    # column name -> per-level array, ready for csv or a pandas DataFrame
+    live = live_squares(corpus)
+    dead = region & ~live
+
+    boxes = corpus.boxes.sum(axis=(1, 2))
+    live_floor = (region & live).sum(axis=(1, 2))
+    difficulty = np.array([log10_binomial(int(f), int(b)) for f, b in zip(live_floor, boxes)])
+
+    return {
+        "levelset": [k[0] for k in corpus.keys],
+        "level": [k[1] for k in corpus.keys],
+        "rows": corpus.rows,
+        "cols": corpus.cols,
+        "boxes": boxes,
+        "goals": corpus.goals.sum(axis=(1, 2)),
+        "floor": region.sum(axis=(1, 2)),
+        "boxes_reachable": (corpus.boxes & region).sum(axis=(1, 2)),
+        "goals_reachable": (corpus.goals & region).sum(axis=(1, 2)),
+        "dead_squares": dead.sum(axis=(1, 2)),
+        "difficulty": np.round(difficulty, 3),
+    }
+
+def canonical_hash(corpus: "Corpus", region, k: int) -> str:
+    # the smallest of the 8 rotations/mirrors of the cropped level; the player
+    # is folded into its region so equivalent start positions compare equal
+    codes = (corpus.walls[k] * 1 + corpus.goals[k] * 2 + corpus.boxes[k] * 4 + region[k] * 8).astype(np.uint8)
+    codes[~(corpus.walls[k] | region[k])] = 0
+    ys, xs = np.nonzero(codes)
+    if len(ys) == 0:
+        return ""
+    codes = codes[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+    best = None
+    for flipped in (codes, np.fliplr(codes)):
+        for turns in range(4):
+            view = np.rot90(flipped, turns)
+            key = bytes(view.shape) + view.tobytes()
+            if best is None or key < best:
+                best = key
+    return hashlib.sha1(best).hexdigest()
+
+def dedup_report(corpus: "Corpus", region) -> list:
+    # groups of levels that are the same puzzle up to rotation or mirroring
+    groups = {}
+    for k, key in enumerate(corpus.keys):
+        groups.setdefault(canonical_hash(corpus, region, k), []).append(list(key))
+    return [members for members in groups.values() if len(members) > 1]
+
+def write_csv(columns: dict, path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in zip(*(columns[name] for name in COLUMNS)):
+            writer.writerow([v.item() if hasattr(v, "item") else v for v in row])
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized statistics over every bundled level.")
+    parser.add_argument("--csv", default="level_stats.csv", help="per-level statistics table")
+    parser.add_argument("--dedup", default="", help="write groups of duplicate levels to this JSON file")
+    args = parser.parse_args()
+
+    loader = LevelLoader()
+    loader.load_levels()
+
+    start = time.perf_counter()
+    corpus = Corpus(loader.get_data())
+    region = player_region(corpus)
+    columns = analyze(corpus, region)
+    duplicates = dedup_report(corpus, region)
+    elapsed = time.perf_counter() - start
+
+    write_csv(columns, args.csv)
+    print("level_analytics :: {} levels in {:.3f}s, {} duplicate groups, table in {}".format(
+        len(corpus.keys), elapsed, len(duplicates), args.csv))
+
+    if args.dedup:
+        with open(args.dedup, "w") as f:
+            json.dump(duplicates, f, indent=2)
+    for members in duplicates:
+        print("  duplicate: " + ", ".join("{} {}".format(ls, ln) for ls, ln in members))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# level_importer.py
+
+# Streaming readers for external level collections:
+#   .xsb / .txt  plain boards separated by blank or text lines
+#   .sok         the same, with "Title:" lines and optional run-length rows
+#   .slc         SLC XML (<SokobanLevels><LevelCollection><Level><L>...</L>)
+#
+# Every reader is a generator, and SLC is read with iterparse, removing each
+# <Level> from the tree once it is yielded, so a 50k level collection is never held in
+# memory. Imports report progress by bytes read and can be cancelled between
+# levels. import_levelset() compiles the stream straight into a level pack.
+
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from level_pack import build_pack
+
+BOARD_CHARS = set("#@+$*.-_ ")
+RLE_CHARS = set("#@+$*.-_ |0123456789")
+
+class ImportCancelled(Exception):
+    pass
+
+def expand_rle(line: str) -> str:
+    # "4#-2$" -> "####-$$"; '|' separates rows in run-length .sok boards
+    return re.sub(r"(\d+)(.)", lambda m: m.group(2) * int(m.group(1)), line)
+
+def to_level_data(rows) -> str:
+    return "".join(row.replace(' ', '_').replace('-', '_') + ";" for row in rows)
+
+def is_board_line(line: str) -> bool:
+    stripped = line.rstrip()
+    if '#' not in stripped:
+        return False
+    chars = RLE_CHARS if any(c.isdigit() or c == '|' for c in stripped) else BOARD_CHARS
+    return all(c in chars for c in stripped)
+
+def iter_xsb(f):
+    # yields (level_name, level_data) from an XSB / .sok text stream
+    rows = []
+    pending_name = None
+    count = 0
+
+    def finish():
+        nonlocal rows, pending_name, count
+        count += 1
+        name = pending_name or "Level {}".format(count)
+        level = (name, to_level_data(rows))
+        rows = []
+        pending_name = None
+        return level
+
+    for line in f:
+        line = line.rstrip("\r\n")
+        if is_board_line(line):
+            line = line.rstrip()
+            if any(c.isdigit() or c == '|' for c in line):
+                rows.extend(expand_rle(line).split('|'))
+            else:
+                rows.append(line)
+            continue
+
+        if rows:
+            title = line.strip()
+            # "Title:" usually follows its board in .sok files
+            if title.lower().startswith("title:"):
+                pending_name = title[6:].strip() or pending_name
+            yield finish()
+            continue
+
+        text = line.strip()
+        if text.startswith(";"):
+            text = text[1:].strip()
+        if text and not text.lower().startswith(("author:", "comment")):
+            # the last text line before a board names it
+            pending_name = text[6:].strip() if text.lower().startswith("title:") else text
+
+    if rows:
+        yield finish()
+
+def iter_slc(f):
+    # yields (level_name, level_data) from an SLC XML byte stream
+    count = 0
+    # open elements, innermost last, so a finished <Level> can be detached
+    # from its <LevelCollection>
+    open_elems = []
+    for event, elem in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            open_elems.append(elem)
+            continue
+        open_elems.pop()
+        if elem.tag != "Level":
+            continue
+        count += 1
+        name = elem.get("Id") or "Level {}".format(count)
+        rows = [row.text or "" for row in elem.findall("L")]
+        yield name, to_level_data(rows)
+        # drop the finished subtree so memory stays flat
+        elem.clear()
+        if open_elems:
+            open_elems[-1].remove(elem)
+
+class LevelImporter:
+    def __init__(self, path: str, on_progress=None, cancel_event=None, progress_every=500):
+        # on_progress(bytes_read, total_bytes, levels_read) is called from the
+        # importing thread; cancel_event is a threading.Event
+        self.path = path
+        self.on_progress = on_progress
+        self.cancel_event = cancel_event
+        self.progress_every = progress_every
+        self.total = os.path.getsize(path)
+        self.count = 0
+
+    def levelset_name(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    def iter_levels(self):
+        ext = os.path.splitext(self.path)[1].lower()
+        with open(self.path, "rb") as raw:
+            if ext == ".slc" or ext == ".xml":
+                levels = iter_slc(raw)
+            else:
+                text = (line.decode("utf-8", errors="replace") for line in raw)
+                levels = iter_xsb(text)
+
+            for name, level_data in levels:
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    raise ImportCancelled(self.path)
+                self.count += 1
+                if self.on_progress and self.count % self.progress_every == 0:
+                    self.on_progress(raw.tell(), self.total, self.count)
+                yield name, level_data
+
+        if self.on_progress:
+            self.on_progress(self.total, self.total, self.count)
+
+    def import_levelset(self, pack_path: str, levelset=None) -> int:
+        # streams the collection into a level pack and returns the level count
+        levelset = levelset or self.levelset_name()
+        records = ((levelset, name, level_data) for name, level_data in unique_names(self.iter_levels()))
+        # build_pack removes its side files when the stream is cancelled or fails
+        return build_pack(records, pack_path)
+
+def unique_names(levels):
+    # level names are dict keys in the menus, so repeated titles get a suffix
+    seen = {}
+    for name, level_data in levels:
+        if name in seen:
+            seen[name] += 1
+            name = "{} ({})".format(name, seen[name])
+        else:
+            seen[name] = 1
+        yield name, level_data
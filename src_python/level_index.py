@@ -0,0 +1,129 @@
+# level_index.py
+
+# Per-level metadata (size, box and goal counts, content hash) kept in a JSON
+# index next to the level files, so menus and progress views can show it
+# without parsing any boards. Each source file is stamped with its mtime,
+# size and sha1. A source whose mtime or size changed is hashed again, and
+# only if the hash differs are its levels rescanned. The index is written back
+# only when something changed.
+#
+# layout:
+#   {"version": 1,
+#    "sources": {path: {"mtime": float, "size": int, "sha1": str}},
+#    "levels":  {levelset: {level_name: [rows, cols, boxes, goals, hash]}}}
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import astuple, dataclass
+
+from instrumentation import get_logger
+
+log = get_logger("loader")
+
+INDEX_VERSION = 1
+
+@dataclass
+class LevelMeta:
+    rows: int
+    cols: int
+    boxes: int
+    goals: int
+    content_hash: str
+
+def level_meta(level_data: str) -> LevelMeta:
+    # straight from the level_data string, no BoardState needed
+    rows = [row for row in level_data.split(";") if row]
+    cols = max((len(row) for row in rows), default=0)
+    boxes = level_data.count("$") + level_data.count("*")
+    goals = level_data.count(".") + level_data.count("*") + level_data.count("+")
+    content_hash = hashlib.sha1(level_data.encode("utf-8")).hexdigest()[:16]
+    return LevelMeta(len(rows), cols, boxes, goals, content_hash)
+
+def file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class LevelIndex:
+    def __init__(self, index_path="level_index.json"):
+        self.index_path = index_path
+        self.sources = {}
+        self.levels = {}
+        self.dirty = False
+
+    def load(self):
+        if not self.index_path or not os.path.isfile(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            log.warning("level index %s unreadable, rebuilding", self.index_path)
+            return
+        if index.get("version") != INDEX_VERSION:
+            return
+        self.sources = index.get("sources", {})
+        self.levels = index.get("levels", {})
+
+    def save(self):
+        if not self.dirty or not self.index_path:
+            return
+        # a tmp file of our own: several processes may load (and save) at once,
+        # and the last replace wins with a complete index either way
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.index_path) + ".",
+                                        suffix=".tmp", dir=os.path.dirname(self.index_path) or ".")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": INDEX_VERSION, "sources": self.sources, "levels": self.levels},
+                          f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            log.warning("could not write level index %s", self.index_path)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.dirty = False
+
+    def is_current(self, path: str) -> bool:
+        # restamps a touched but unchanged file so it is not hashed again
+        stamp = self.sources.get(path)
+        if stamp is None:
+            return False
+
+        stat = os.stat(path)
+        if stamp["mtime"] == stat.st_mtime and stamp["size"] == stat.st_size:
+            return True
+        if stamp["sha1"] != file_sha1(path):
+            return False
+
+        stamp["mtime"] = stat.st_mtime
+        stamp["size"] = stat.st_size
+        self.dirty = True
+        return True
+
+    def refresh(self, sources: dict, data: dict) -> bool:
+        # sources maps a source file path to the levelsets read from it;
+        # levelsets of stale sources are rescanned from data. True if the
+        # index changed and needs a save()
+        for path, levelsets in sources.items():
+            if self.is_current(path) and all(name in self.levels for name in levelsets):
+                continue
+
+            for levelset in levelsets:
+                levels = data.get(levelset, {})
+                self.levels[levelset] = {
+                    name: list(astuple(level_meta(levels[name]))) for name in levels}
+            stat = os.stat(path)
+            self.sources[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": file_sha1(path)}
+            self.dirty = True
+            log.info("level index: rescanned %s", path)
+        return self.dirty
+
+    def get(self, levelset: str, level_name: str):
+        # LevelMeta, or None for levels the index has not seen
+        entry = self.levels.get(levelset, {}).get(level_name)
+        return LevelMeta(*entry) if entry is not None else None
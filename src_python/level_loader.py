@@ -1,14 +1,101 @@
 # level_loader.py
- 
+
 import os
-import json 
+import json
+
+from instrumentation import get_logger
+from level_index import LevelIndex
+from level_pack import LevelPack, read_sources
+
+log = get_logger("loader")
 
 class LevelLoader:
-    def __init__(self, level_dir="level_data"):
+    def __init__(self, level_dir="level_data", pack_path="level_data.pack", import_dir="imported",
+                 index_path="level_index.json"):
+        # pack_path=None always parses the text files, index_path=None keeps
+        # the metadata index in memory only
         self.level_dir = level_dir
+        self.pack_path = pack_path
+        self.import_dir = import_dir
+        self.pack = None
+        self.imported_packs = []
         self.data = {}
+        self.index = LevelIndex(index_path)
 
     def load_levels(self):
+        if self.pack_is_current():
+            self.pack = LevelPack(self.pack_path)
+            self.data = self.pack.get_data()
+            log.info("level pack mapped: %s", self.pack_path)
+        else:
+            self.load_text_levels()
+
+        # the text files are the source of truth even when the pack is used
+        self.index.load()
+        if self.index.refresh(self.text_sources(), self.data):
+            self.index.save()
+
+        self.load_imported_packs()
+
+    def text_sources(self) -> dict:
+        # level file path -> [levelset]
+        sources = {}
+        for file_name in sorted(os.listdir(self.level_dir)):
+            file_path = os.path.join(self.level_dir, file_name)
+            if os.path.isfile(file_path) and file_name.endswith(".txt"):
+                sources[file_path] = [os.path.splitext(file_name)[0]]
+        return sources
+
+    def load_imported_packs(self):
+        # collections added with File > Import are kept as packs in import_dir
+        if not self.import_dir or not os.path.isdir(self.import_dir):
+            return
+
+        for file_name in sorted(os.listdir(self.import_dir)):
+            if file_name.endswith(".pack"):
+                self.add_pack(os.path.join(self.import_dir, file_name))
+
+    def open_pack(self, pack_path: str):
+        # maps a pack and brings the metadata index up to date for it; the
+        # slow part of adding a big pack, safe to run on the import thread
+        # since the Tk thread only reads the index
+        pack = LevelPack(pack_path)
+        if self.index.refresh({pack_path: list(pack.get_data().keys())}, pack.get_data()):
+            self.index.save()
+        return pack
+
+    def add_pack(self, pack_path: str, pack=None) -> list:
+        # adds a pack, opened here unless open_pack() already did it, and
+        # returns the names of the levelsets it added
+        if pack is None:
+            pack = self.open_pack(pack_path)
+        self.imported_packs.append(pack)
+        self.data.update(pack.get_data())
+        return list(pack.get_data().keys())
+
+    def imported_pack_path(self, levelset: str) -> str:
+        os.makedirs(self.import_dir, exist_ok=True)
+        return os.path.join(self.import_dir, levelset + ".pack")
+
+    def pack_is_current(self) -> bool:
+        # the pack is used only when it was built from exactly the text files
+        # there are now and is newer than every one of them
+        if not self.pack_path or not os.path.isfile(self.pack_path):
+            return False
+
+        sources = read_sources(self.pack_path)
+        if sources is None or sorted(sources) != sorted(os.path.basename(path) for path in self.text_sources()):
+            log.info("level pack %s was built from other level files", self.pack_path)
+            return False
+
+        pack_mtime = os.path.getmtime(self.pack_path)
+        for file_name in os.listdir(self.level_dir):
+            file_path = os.path.join(self.level_dir, file_name)
+            if file_name.endswith(".txt") and os.path.getmtime(file_path) > pack_mtime:
+                return False
+        return True
+
+    def load_text_levels(self):
         # iterate over each file in the level_dir
         for file_name in os.listdir(self.level_dir):
             file_path = os.path.join(self.level_dir, file_name)
@@ -19,41 +106,48 @@ class LevelLoader:
 
             # strip extension to get levelset name
             current_levelset = os.path.splitext(file_name)[0]
-            self.data[current_levelset] = {}
+            self.data[current_levelset] = dict(self.parse_levelset_file(file_path))
 
-            level_count = 0
-            level_name = None
+        log.info("all text levels processed")
 
-            # read file line by line
-            with open(file_path, "r") as f:
-                for line in f:
-                    line = line.replace(' ',  '_')
+    def parse_levelset_file(self, file_path: str):
+        # yields (level_name, level_data) for each level in the file
+        level_count = 0
+        level_name = None
+        rows = []
 
-                    line = line.strip()
-                    if not line:
-                        continue  # skip blank lines
+        # read file line by line
+        with open(file_path, "r") as f:
+            for line in f:
+                line = line.replace(' ',  '_')
 
-                    if line.startswith(";"):  # new level
-                        level_count += 1
-                        level_name = f"Level {level_count}"
+                line = line.strip()
+                if not line:
+                    continue  # skip blank lines
 
-                        # look for optional nickname in quotes
-                        if "'" in line:
-                            nickname = line.split("'", 2)[1]
-                            level_name += f" '{nickname}'"
+                if line.startswith(";"):  # new level
+                    if level_name:
+                        yield level_name, "".join(row + ";" for row in rows)
 
-                        # initialize container
-                        self.data[current_levelset][level_name] = ""
-                        continue
+                    level_count += 1
+                    level_name = f"Level {level_count}"
+                    rows = []
 
-                    # replace whitespace with underscores
-                    line = line.replace(" ", "_")
-                    if level_name:
-                        self.data[current_levelset][level_name] += line + ";"
+                    # look for optional nickname in quotes
+                    if "'" in line:
+                        nickname = line.split("'", 2)[1]
+                        level_name += f" '{nickname}'"
+                    continue
+
+                if level_name:
+                    rows.append(line)
 
-        print("LevelLoader :: All levels processed.")
-        
+        if level_name:
+            yield level_name, "".join(row + ";" for row in rows)
 
     def get_data(self) -> dict:
         return self.data
 
+    def get_meta(self, levelset: str, level_name: str):
+        # LevelMeta from the index, without touching the level data
+        return self.index.get(levelset, level_name)
@@ -0,0 +1,187 @@
+# level_pack.py
+
+# Binary level pack: every levelset compiled into one file with an offset
+# table, memory-mapped at startup. Only the index is read up front; a level's
+# board string is sliced out of the map and decoded when it is asked for.
+#
+# layout (little endian):
+#   header   MAGIC, u32 num_levels, u32 sources_len
+#   sources  utf-8 names of the files the pack was built from, "\n" separated
+#   index    num_levels x (u32 levelset_off, u16 levelset_len,
+#                          u32 name_off, u16 name_len, u32 data_off, u32 data_len)
+#   blob     utf-8 names, then utf-8 boards; offsets relative to the blob start
+#
+# build with: python level_pack.py [level_dir] [pack_path]
+
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+
+MAGIC = b"SOKPACK2"
+HEADER = struct.Struct("<8sII")
+ENTRY = struct.Struct("<IHIHII")
+
+# version 1 packs have no source list; they still load (imported packs are
+# never rebuilt) but are never current for the bundled levels
+MAGIC_V1 = b"SOKPACK1"
+HEADER_V1 = struct.Struct("<8sI")
+
+def build_pack(records, pack_path: str, sources=()) -> int:
+    # records yields (levelset, level_name, level_data) and may be a generator;
+    # board strings are streamed to a scratch file so only the index and the
+    # names are held in memory. sources names the files the records came from
+    tmp_path = pack_path + ".tmp"
+    blob_path = pack_path + ".blob"
+    try:
+        count = write_pack(records, tmp_path, blob_path, sources)
+    except BaseException:
+        # cancelled, bad input or a full disk: leave no side files behind
+        for path in (tmp_path, blob_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    os.remove(blob_path)
+    os.replace(tmp_path, pack_path)
+    return count
+
+def write_pack(records, tmp_path: str, blob_path: str, sources) -> int:
+    names = bytearray()
+    name_offsets = {}
+    entries = bytearray()
+    count = 0
+
+    with open(blob_path, "w+b") as blob:
+        def add_name(text: str):
+            if text not in name_offsets:
+                raw = text.encode("utf-8")
+                name_offsets[text] = (len(names), len(raw))
+                names.extend(raw)
+            return name_offsets[text]
+
+        for levelset, level_name, level_data in records:
+            levelset_off, levelset_len = add_name(levelset)
+            name_off, name_len = add_name(level_name)
+            raw = level_data.encode("utf-8")
+            entries.extend(ENTRY.pack(levelset_off, levelset_len, name_off, name_len, blob.tell(), len(raw)))
+            blob.write(raw)
+            count += 1
+
+        # names go first in the blob region, boards follow them
+        blob.seek(0)
+        # write to a temp file first so a running game never maps a half-written pack
+        with open(tmp_path, "wb") as f:
+            raw_sources = "\n".join(sources).encode("utf-8")
+            f.write(HEADER.pack(MAGIC, count, len(raw_sources)))
+            f.write(raw_sources)
+            f.write(shift_data_offsets(entries, len(names)))
+            f.write(names)
+            while True:
+                chunk = blob.read(1 << 20)
+                if not chunk:
+                    break
+                f.write(chunk)
+    return count
+
+def shift_data_offsets(entries: bytearray, shift: int) -> bytearray:
+    out = bytearray()
+    for pos in range(0, len(entries), ENTRY.size):
+        levelset_off, levelset_len, name_off, name_len, data_off, data_len = ENTRY.unpack_from(entries, pos)
+        out.extend(ENTRY.pack(levelset_off, levelset_len, name_off, name_len, data_off + shift, data_len))
+    return out
+
+def iter_records(data: dict):
+    # {levelset: {level_name: level_data}} -> build_pack records
+    for levelset, levels in data.items():
+        for level_name, level_data in levels.items():
+            yield levelset, level_name, level_data
+
+def read_sources(pack_path: str):
+    # the source file names from a pack header without mapping the pack;
+    # None for a version 1 pack or a file that is not a pack
+    with open(pack_path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            return None
+        _, _, sources_len = HEADER.unpack(header)
+        raw_sources = f.read(sources_len)
+    return raw_sources.decode("utf-8").split("\n") if raw_sources else []
+
+class LazyLevelset(Mapping):
+    # level_name -> level_data, decoded from the pack on access
+    def __init__(self, pack: "LevelPack"):
+        self.pack = pack
+        self.spans = {}
+
+    def __getitem__(self, level_name: str) -> str:
+        offset, length = self.spans[level_name]
+        return self.pack.read_string(offset, length)
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+class LevelPack:
+    def __init__(self, pack_path: str):
+        self.pack_path = pack_path
+        self.levelsets = {}
+
+        with open(pack_path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # source file names, None for a version 1 pack
+        self.sources = None
+        magic = self.mm[:len(MAGIC)]
+        if magic == MAGIC:
+            _, num_levels, sources_len = HEADER.unpack_from(self.mm, 0)
+            raw_sources = self.mm[HEADER.size:HEADER.size + sources_len]
+            self.sources = raw_sources.decode("utf-8").split("\n") if raw_sources else []
+            index_start = HEADER.size + sources_len
+        elif magic == MAGIC_V1:
+            _, num_levels = HEADER_V1.unpack_from(self.mm, 0)
+            index_start = HEADER_V1.size
+        else:
+            raise ValueError("{} is not a level pack".format(pack_path))
+
+        self.blob_start = index_start + num_levels * ENTRY.size
+        names = {}
+        for i in range(num_levels):
+            levelset_off, levelset_len, name_off, name_len, data_off, data_len = \
+                ENTRY.unpack_from(self.mm, index_start + i * ENTRY.size)
+
+            key = (levelset_off, levelset_len)
+            if key not in names:
+                names[key] = self.read_string(levelset_off, levelset_len)
+            levelset = names[key]
+
+            if levelset not in self.levelsets:
+                self.levelsets[levelset] = LazyLevelset(self)
+            level_name = self.read_string(name_off, name_len)
+            self.levelsets[levelset].spans[level_name] = (data_off, data_len)
+
+    def read_string(self, offset: int, length: int) -> str:
+        start = self.blob_start + offset
+        return self.mm[start:start + length].decode("utf-8")
+
+    def get_data(self) -> dict:
+        return self.levelsets
+
+    def close(self):
+        self.mm.close()
+
+if __name__ == "__main__":
+    import sys
+    from level_loader import LevelLoader
+
+    level_dir = sys.argv[1] if len(sys.argv) > 1 else "level_data"
+    pack_path = sys.argv[2] if len(sys.argv) > 2 else level_dir + ".pack"
+
+    # the bundled text files only: no imported packs, and no index rewrite
+    loader = LevelLoader(level_dir, pack_path=None, import_dir=None, index_path=None)
+    loader.load_levels()
+    sources = [os.path.basename(path) for path in loader.text_sources()]
+    count = build_pack(iter_records(loader.get_data()), pack_path, sources)
+    print("level_pack :: wrote {} levels to {}".format(count, pack_path))
@@ -0,0 +1,73 @@
+# level_prefetcher.py
+
+# Prepares the levels next to the current one on a worker thread while the
+# player is busy: the board is parsed, the deadlock tables and the starting
+# reachable region are built (engine.prepare_level) and the canvas layout is
+# computed for the current tile size. Switching to a prefetched level then
+# only has to copy the start position and create the canvas items.
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from instrumentation import get_logger
+from sokoban_engine import PreparedLevel, prepare_level
+
+log = get_logger("prefetch")
+
+@dataclass
+class PrefetchedLevel:
+    level_data: str
+    prepared: PreparedLevel
+    tile_size: int
+    layout: list
+
+class LevelPrefetcher:
+    def __init__(self, get_layout, cache_size=6):
+        # get_layout(board_state, tile_size) -> canvas layout, called on the
+        # worker thread, so it must not touch Tk
+        self.get_layout = get_layout
+        self.cache_size = cache_size
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LevelPrefetcher")
+
+        # (levelset, level_name) -> Future of PrefetchedLevel, oldest first
+        self.futures = OrderedDict()
+
+    def prefetch(self, levelset: str, level_name: str, level_data: str, tile_size: int):
+        key = (levelset, level_name)
+        future = self.futures.get(key)
+        if future is not None and not future.cancelled():
+            self.futures.move_to_end(key)
+            return
+
+        self.futures[key] = self.pool.submit(self.prepare, level_data, tile_size)
+        while len(self.futures) > self.cache_size:
+            _, old = self.futures.popitem(last=False)
+            old.cancel()
+
+    def prepare(self, level_data: str, tile_size: int) -> PrefetchedLevel:
+        prepared = prepare_level(level_data)
+        layout = self.get_layout(prepared.board_state, tile_size)
+        return PrefetchedLevel(level_data, prepared, tile_size, layout)
+
+    def take(self, levelset: str, level_name: str, level_data: str):
+        # the PrefetchedLevel if it was requested, waiting for it if the worker
+        # is already on it; None if it was never asked for, is still queued
+        # behind other levels, or failed
+        future = self.futures.pop((levelset, level_name), None)
+        if future is None or future.cancel() or future.cancelled():
+            return None
+        try:
+            result = future.result()
+        except Exception:
+            log.exception("prefetch of %r %r failed", levelset, level_name)
+            return None
+        if result.level_data != level_data:
+            return None
+        return result
+
+    def close(self):
+        for future in self.futures.values():
+            future.cancel()
+        self.futures.clear()
+        self.pool.shutdown(wait=False)
@@ -4,18 +4,29 @@
 import sys
 sys.dont_write_bytecode = True
 
+import argparse
 import tkinter as tk 
 from game_manager import GameManager
+from instrumentation import configure_logging
 
 def main():
+    parser = argparse.ArgumentParser(description="Sokoban")
+    parser.add_argument("--profile-startup", action="store_true", help="print startup phase timings")
+    parser.add_argument("--debug", action="store_true", help="collect move/redraw/load latency histograms")
+    parser.add_argument("--log-level", default="warning", help="debug, info, warning or error")
+    parser.add_argument("--log", action="append", default=[], metavar="SUBSYSTEM=LEVEL",
+                        help="per subsystem level, e.g. canvas=debug (engine, game, canvas, loader, ui)")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level, args.log)
+
     root = tk.Tk()
     root.title("Sokoban App")
     root.geometry("{}x{}".format(800, 800))
 
-    g = GameManager(root)
+    g = GameManager(root, profile_startup=args.profile_startup, debug=args.debug)
 
     root.mainloop()
     
 if __name__ == "__main__":
     main()
-
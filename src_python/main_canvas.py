@@ -1,9 +1,30 @@
 # main_canvas.py 
 
+# The board is drawn with a fixed pool of canvas items that covers only the
+# visible rectangle of the board (the view): one background rectangle and one
+# image per visible cell. Scrolling retargets the pool instead of creating
+# items, so a 50x50 level costs the same to draw as a 7x7 one. The view
+# follows the player and can be scrolled with the mouse wheel. Canvas resizes
+# are debounced and then handed to the controller, which may refit the tile
+# size.
+
 import tkinter as tk
 
+from instrumentation import get_logger
+
+log = get_logger("canvas")
+
 tile_size = 100
 
+# cells kept between the player and the edge of the view when following
+FOLLOW_MARGIN = 2
+
+# a resize is handled once the window has stopped changing for this long
+RESIZE_DELAY_MS = 150
+
+# cells scrolled per mouse wheel notch
+SCROLL_STEP = 3
+
 class Colors:
     SolutionColor = "#00aa00"
     # TanLight =  "#F0E68C"
@@ -20,41 +41,307 @@ class MainCanvas:
         self.canvas.pack(side="top", fill="both", expand=True)
 
         self.canvas.focus_set()
-        
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Configure>", self.on_configure)
+
+        # wheel scrolls the view, shift+wheel scrolls it sideways; X11 sends
+        # buttons 4 and 5 instead of <MouseWheel>
+        self.canvas.bind("<MouseWheel>", lambda event: self.on_wheel(event.delta, vertical=True))
+        self.canvas.bind("<Shift-MouseWheel>", lambda event: self.on_wheel(event.delta, vertical=False))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-SCROLL_STEP, 0))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(SCROLL_STEP, 0))
+        self.canvas.bind("<Shift-Button-4>", lambda event: self.scroll(0, -SCROLL_STEP))
+        self.canvas.bind("<Shift-Button-5>", lambda event: self.scroll(0, SCROLL_STEP))
+
         self.tk_images = self.controller.image_handler.tk_images 
 
-    def redraw(self, board_state, setting_state):
-        print("on redraw")
-        
-        tile_size = setting_state.tile_size 
+        # retained canvas items, one per visible cell ("slot"), indexed by
+        # (row - view_row) * view_cols + (col - view_col)
+        self.tile_size = 0
+        self.cell_rects = []
+        self.cell_items = []
+        self.cell_fills = []
+        self.cell_sprites = []
+        self.num_rows = 0
+        self.num_cols = 0
+        self.board_state = None
 
-        self.canvas.delete("all")
-            
+        # the visible part of the board, in cells
+        self.view_row = 0
+        self.view_col = 0
+        self.view_rows = 0
+        self.view_cols = 0
+
+        # canvas size as of the last handled <Configure>, 0 until mapped
+        self.canvas_width = 0
+        self.canvas_height = 0
+        self.pending_size = (0, 0)
+        self.resize_job = None
+
+        # outline around the box picked for click-to-push
+        self.selected_idx = None
+        self.selection_item = None
+
+        # debug overlay text, drawn above the board when shown
+        self.overlay_item = None
+
+    def on_click(self, event):
+        # map the click to a board cell and let the controller walk or push
+        if not self.tile_size:
+            return
+        col = self.view_col + int(self.canvas.canvasx(event.x)) // self.tile_size
+        row = self.view_row + int(self.canvas.canvasy(event.y)) // self.tile_size
+        if 0 <= row < self.num_rows and 0 <= col < self.num_cols:
+            self.controller.on_cell_click(row, col)
+
+    # resize and scrolling --------------------------------------------------
+    def on_configure(self, event):
+        # a window drag sends a burst of these; only the last size is handled
+        self.pending_size = (event.width, event.height)
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(RESIZE_DELAY_MS, self.on_resize_done)
+
+    def on_resize_done(self):
+        self.resize_job = None
+        if self.pending_size == (self.canvas_width, self.canvas_height):
+            return
+        self.canvas_width, self.canvas_height = self.pending_size
+        log.debug("resized to %dx%d", self.canvas_width, self.canvas_height)
+        self.controller.on_canvas_resize(self.canvas_width, self.canvas_height)
+
+    def canvas_size(self):
+        # (width, height) in pixels; the requested size until the canvas is mapped
+        if self.canvas_width:
+            return self.canvas_width, self.canvas_height
+        return self.canvas.winfo_reqwidth(), self.canvas.winfo_reqheight()
+
+    def view_shape(self, board_state, tile_size):
+        # (rows, cols) of the board that fit on the canvas, partial cells included
+        width, height = self.canvas_size()
+        return (min(board_state.num_rows, -(-height // tile_size)),
+                min(board_state.num_cols, -(-width // tile_size)))
+
+    def on_wheel(self, delta, vertical):
+        step = -SCROLL_STEP if delta > 0 else SCROLL_STEP
+        if vertical:
+            self.scroll(step, 0)
+        else:
+            self.scroll(0, step)
+
+    def scroll(self, rows, cols):
+        if self.board_state is None:
+            return
+        self.scroll_to(self.view_row + rows, self.view_col + cols)
+
+    def scroll_to(self, row, col) -> bool:
+        # moves the view's top left cell, clamped to the board; True if it moved
+        row = max(0, min(row, self.num_rows - self.view_rows))
+        col = max(0, min(col, self.num_cols - self.view_cols))
+        if row == self.view_row and col == self.view_col:
+            return False
+
+        self.view_row = row
+        self.view_col = col
+        self.fill_view()
+        return True
+
+    def follow_player(self, board_state) -> bool:
+        # scroll just far enough to keep FOLLOW_MARGIN cells around the player
+        if board_state.player < 0:
+            return False
+        row, col = divmod(board_state.player, board_state.num_cols)
+        return self.scroll_to(follow(row, self.view_row, self.view_rows),
+                              follow(col, self.view_col, self.view_cols))
+
+    def slot(self, idx) -> int:
+        # the slot showing board cell idx, -1 if it is out of view
+        row, col = divmod(idx, self.num_cols)
+        row -= self.view_row
+        col -= self.view_col
+        if 0 <= row < self.view_rows and 0 <= col < self.view_cols:
+            return row * self.view_cols + col
+        return -1
+
+    # drawing --------------------------------------------------
+    def select_cell(self, idx):
+        # idx=None clears the selection
+        self.selected_idx = idx
+        self.place_selection()
+
+    def place_selection(self):
+        if self.selection_item is not None:
+            self.canvas.delete(self.selection_item)
+            self.selection_item = None
+        if self.selected_idx is None:
+            return
+
+        slot = self.slot(self.selected_idx)
+        if slot < 0:
+            return
+        x0 = (slot % self.view_cols) * self.tile_size
+        y0 = (slot // self.view_cols) * self.tile_size
+        self.selection_item = self.canvas.create_rectangle(
+            x0 + 1, y0 + 1, x0 + self.tile_size - 1, y0 + self.tile_size - 1,
+            outline="#ffff00", width=3)
+
+    def redraw(self, board_state, setting_state, dirty_cells=None, layout=None):
+        # dirty_cells lists the cell indices that changed since the last call;
+        # None means the level changed and everything is rebuilt, from a
+        # precomputed layout() when one is given. A new tile size or canvas
+        # size rebuilds too, but only the cells in view.
+        tile_size = setting_state.tile_size
+        self.board_state = board_state
+
+        if (dirty_cells is None or tile_size != self.tile_size
+                or board_state.num_rows != self.num_rows or board_state.num_cols != self.num_cols
+                or self.view_shape(board_state, tile_size) != (self.view_rows, self.view_cols)):
+            self.rebuild(board_state, tile_size, layout)
+            return
+
+        # a scroll redraws every slot, dirty cells included
+        if self.follow_player(board_state):
+            return
+
+        for idx in dirty_cells:
+            slot = self.slot(idx)
+            if slot >= 0:
+                self.update_slot(slot, idx)
+
+    def sprite_name(self, board_state, idx):
+        if board_state.walls[idx]:
+            return "wall"
+        if idx == board_state.player:
+            return "player"
+        if board_state.boxes[idx]:
+            return "box_white" if board_state.goals[idx] else "box_red"
+        return None
+
+    def cell_look(self, board_state, idx):
+        # (background fill, sprite name) of a board cell
+        row, col = divmod(idx, board_state.num_cols)
+        if board_state.goals[idx]:
+            grid_bg_color = Colors.SolutionColor
+        elif (row + col) % 2 == 0:
+            grid_bg_color = "#999999"
+        else:
+            grid_bg_color = "#777777"
+        return grid_bg_color, self.sprite_name(board_state, idx)
+
+    def layout(self, board_state, tile_size):
+        # (x0, y0, x1, y1, fill, sprite name) per cell of the whole board;
+        # touches no Tk state, so the level prefetcher can build it on a
+        # worker thread. Used by rebuild() when the whole board is in view.
+        cells = []
         for row in range(board_state.num_rows):
             for col in range(board_state.num_cols):
-                g = board_state.grid[row][col]
                 x0 = col * tile_size
                 y0 = row * tile_size
-                x1 = x0 + tile_size
-                y1 = y0 + tile_size
-                
-                grid_bg_color = "#000000"
-                if (g.is_solution_spot):
-                    grid_bg_color = "#00aa00"
-                elif ((row + col) % 2 == 0):
-                    grid_bg_color = "#999999"
-                else:
-                    grid_bg_color = "#777777"
-
-                self.canvas.create_rectangle( x0, y0, x1, y1, fill=grid_bg_color)
-
-                if g.is_wall:
-                    self.canvas.create_image( x0, y0, image=self.tk_images["wall"], anchor="nw")
-                
-                if g.is_player:
-                    self.canvas.create_image( x0, y0, image=self.tk_images["player"], anchor="nw")
-
-                if g.is_box:
-                    box_lookup = "box_white" if g.is_solution_spot else "box_red"
-                    self.canvas.create_image( x0, y0, image=self.tk_images[box_lookup], anchor="nw")
+                grid_bg_color, name = self.cell_look(board_state, board_state.index(row, col))
+                cells.append((x0, y0, x0 + tile_size, y0 + tile_size, grid_bg_color, name))
+        return cells
+
+    def rebuild(self, board_state, tile_size, layout=None):
+        self.tile_size = tile_size
+        self.num_rows = board_state.num_rows
+        self.num_cols = board_state.num_cols
+        self.view_rows, self.view_cols = self.view_shape(board_state, tile_size)
+        self.board_state = board_state
+        self.selection_item = None
+        self.overlay_item = None
+
+        log.debug("rebuild %dx%d at tile size %d, %dx%d in view", self.num_rows, self.num_cols,
+                  tile_size, self.view_rows, self.view_cols)
+
+        # start with the player in the middle of the view
+        if board_state.player >= 0:
+            row, col = divmod(board_state.player, board_state.num_cols)
+        else:
+            row = col = 0
+        self.view_row = max(0, min(row - self.view_rows // 2, self.num_rows - self.view_rows))
+        self.view_col = max(0, min(col - self.view_cols // 2, self.num_cols - self.view_cols))
+
+        self.cell_rects = []
+        self.cell_items = []
+        self.cell_fills = []
+        self.cell_sprites = []
+        self.canvas.delete("all")
+
+        whole_board = self.view_rows == self.num_rows and self.view_cols == self.num_cols
+        if whole_board and layout is not None and len(layout) == len(board_state.walls):
+            for x0, y0, x1, y1, grid_bg_color, name in layout:
+                self.add_slot(x0, y0, grid_bg_color, name)
+        else:
+            for slot in range(self.view_rows * self.view_cols):
+                view_row, view_col = divmod(slot, self.view_cols)
+                idx = board_state.index(self.view_row + view_row, self.view_col + view_col)
+                grid_bg_color, name = self.cell_look(board_state, idx)
+                self.add_slot(view_col * tile_size, view_row * tile_size, grid_bg_color, name)
+
+        self.place_selection()
+
+    def add_slot(self, x0, y0, grid_bg_color, name):
+        rect = self.canvas.create_rectangle( x0, y0, x0 + self.tile_size, y0 + self.tile_size, fill=grid_bg_color)
+
+        # one image item per slot, retargeted as the player and boxes move
+        # and as the view scrolls
+        if name:
+            item = self.canvas.create_image( x0, y0, image=self.tk_images[name], anchor="nw")
+        else:
+            item = self.canvas.create_image( x0, y0, anchor="nw", state="hidden")
+
+        self.cell_rects.append(rect)
+        self.cell_items.append(item)
+        self.cell_fills.append(grid_bg_color)
+        self.cell_sprites.append(name)
+
+    def fill_view(self):
+        # after a scroll: point every slot at its new cell
+        for slot in range(len(self.cell_items)):
+            view_row, view_col = divmod(slot, self.view_cols)
+            self.update_slot(slot, self.board_state.index(self.view_row + view_row, self.view_col + view_col))
+        self.place_selection()
+        if self.overlay_item is not None:
+            self.canvas.tag_raise(self.overlay_item)
+
+    def update_slot(self, slot, idx):
+        grid_bg_color, name = self.cell_look(self.board_state, idx)
+        if grid_bg_color != self.cell_fills[slot]:
+            self.cell_fills[slot] = grid_bg_color
+            self.canvas.itemconfigure(self.cell_rects[slot], fill=grid_bg_color)
+
+        if name == self.cell_sprites[slot]:
+            return
+
+        self.cell_sprites[slot] = name
+        item = self.cell_items[slot]
+        if name:
+            self.canvas.itemconfigure(item, image=self.tk_images[name], state="normal")
+        else:
+            self.canvas.itemconfigure(item, state="hidden")
+
+    def show_overlay(self, lines):
+        # lines=None hides the overlay
+        if lines is None:
+            if self.overlay_item is not None:
+                self.canvas.delete(self.overlay_item)
+                self.overlay_item = None
+            return
+
+        text = "\n".join(lines)
+        if self.overlay_item is None:
+            self.overlay_item = self.canvas.create_text(
+                4, 4, text=text, anchor="nw", fill="#ffff00", font="TkFixedFont")
+        else:
+            self.canvas.itemconfigure(self.overlay_item, text=text)
+            self.canvas.tag_raise(self.overlay_item)
 
+def follow(pos, start, length):
+    # new start of a view axis of the given length so that pos keeps
+    # FOLLOW_MARGIN cells (fewer in a small view) to either edge
+    margin = min(FOLLOW_MARGIN, (length - 1) // 2)
+    if pos < start + margin:
+        return pos - margin
+    if pos > start + length - 1 - margin:
+        return pos - length + 1 + margin
+    return start
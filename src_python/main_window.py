@@ -5,6 +5,16 @@ import tkinter as tk
 
 from popups import AboutPopup, WinPopup
 from main_canvas import MainCanvas 
+from settings_manager import REPLAY_SPEEDS
+
+# Level Select filters: label -> test on (LevelMeta or None, LevelProgress or None)
+LEVEL_FILTERS = {
+    "All levels": lambda meta, progress: True,
+    "Unsolved only": lambda meta, progress: progress is None,
+    "Solved only": lambda meta, progress: progress is not None,
+    "Up to 4 boxes": lambda meta, progress: meta is None or meta.boxes <= 4,
+    "Up to 8 boxes": lambda meta, progress: meta is None or meta.boxes <= 8,
+}
 
 class MainWindow(tk.Frame):
     def __init__(self, root, controller):
@@ -18,60 +28,141 @@ class MainWindow(tk.Frame):
 
         self.canvas = MainCanvas(root, controller)
 
+        # str(menu) of every lazily filled menu that has been populated
+        self.filled_menus = set()
+
+        # category menus already filled, emptied again when the filter changes
+        self.category_menus = []
+        self.level_filter = tk.StringVar(value="All levels")
+        self.replay_speed = tk.IntVar(value=controller.settings_manager.replay_speed)
+
         self.bind_events()
         self.setup_menubar()
     
-    def build_level_menu(self, menubar, data, on_level_load, levels_per_category=20):
+    def build_level_menu(self, menubar, get_data, on_level_load, levels_per_category=20):
+        # submenus are filled by postcommand the first time they are opened,
+        # so startup only creates the top level cascade
+        level_menu = tk.Menu(menubar, tearoff=0)
+        level_menu.configure(postcommand=lambda: self.fill_level_menu(
+            level_menu, get_data(), on_level_load, levels_per_category))
+        menubar.add_cascade(label="Level Select", menu=level_menu)
+
+        # filters only need the metadata index and the progress store
+        filter_menu = tk.Menu(level_menu, tearoff=0)
+        for label in LEVEL_FILTERS:
+            filter_menu.add_radiobutton(label=label, value=label, variable=self.level_filter,
+                                        command=self.refresh_level_menus)
+        level_menu.add_cascade(label="Filter", menu=filter_menu)
+        level_menu.add_separator()
+
+        self.level_menu = level_menu
+        self.get_data = get_data
+        self.on_level_load = on_level_load
+        self.levels_per_category = levels_per_category
+
+    def add_levelset(self, levelset_name):
+        # imported levelsets; until the menu is first opened they are picked
+        # up by fill_level_menu like the bundled ones
+        if str(self.level_menu) not in self.filled_menus:
+            return
+        self.add_levelset_cascade(self.level_menu, levelset_name, self.get_data(),
+                                  self.on_level_load, self.levels_per_category)
+
+    def claim_menu(self, menu) -> bool:
+        # True the first time a menu is seen, False afterwards
+        if str(menu) in self.filled_menus:
+            return False
+        self.filled_menus.add(str(menu))
+        return True
+
+    def fill_level_menu(self, level_menu, data, on_level_load, levels_per_category):
         def natural_sort_key(s):
             return [int(text) if text.isdigit() else text.lower()
                     for text in re.split("([0-9]+)", s)]
 
-        level_menu = tk.Menu(menubar, tearoff=0)
+        if not data or not self.claim_menu(level_menu):
+            return
 
         for levelset_name in sorted(data.keys(), key=natural_sort_key):
-            levelset_menu = tk.Menu(level_menu, tearoff=0)
-            num_levels = len(data[levelset_name])
-
-            # iterate through levels
-            level_names = list(data[levelset_name].keys())
-
-            levelset_submenu = None
-            category_name = None
+            self.add_levelset_cascade(level_menu, levelset_name, data, on_level_load, levels_per_category)
+
+    def add_levelset_cascade(self, level_menu, levelset_name, data, on_level_load, levels_per_category):
+        levelset_menu = tk.Menu(level_menu, tearoff=0)
+        levelset_menu.configure(postcommand=lambda: self.fill_levelset_menu(
+            levelset_menu, levelset_name, list(data[levelset_name].keys()), on_level_load, levels_per_category))
+
+        # attach this levelset menu
+        level_menu.add_cascade(label=levelset_name, menu=levelset_menu)
+
+    def fill_levelset_menu(self, levelset_menu, levelset_name, level_names, on_level_load, levels_per_category):
+        if not self.claim_menu(levelset_menu):
+            return
+
+        num_levels = len(level_names)
+        for idx in range(0, num_levels, levels_per_category):
+            chunk = level_names[idx:idx + levels_per_category]
+            end_idx = min(idx + levels_per_category - 1, num_levels - 1)
+            category_name = f"Levels {idx + 1} to {end_idx + 1} ..."
+
+            levelset_submenu = tk.Menu(levelset_menu, tearoff=0)
+            levelset_submenu.configure(postcommand=lambda m=levelset_submenu, c=chunk: self.fill_category_menu(
+                m, levelset_name, c, on_level_load))
+            levelset_menu.add_cascade(label=category_name, menu=levelset_submenu)
+
+    def fill_category_menu(self, levelset_submenu, levelset_name, level_names, on_level_load):
+        if not self.claim_menu(levelset_submenu):
+            return
+        self.category_menus.append(levelset_submenu)
+
+        get_meta = self.controller.level_loader.get_meta
+        get_progress = self.controller.progress_manager.get_progress
+        keep = LEVEL_FILTERS[self.level_filter.get()]
+
+        for level_name in level_names:
+            meta = get_meta(levelset_name, level_name)
+            progress = get_progress(levelset_name, level_name)
+            if not keep(meta, progress):
+                continue
+
+            # add the level command
+            levelset_submenu.add_command(
+                label=self.level_label(level_name, meta, progress),
+                command=lambda ls=levelset_name, ln=level_name: on_level_load(ls, ln)
+            )
+
+    def level_label(self, level_name, meta, progress) -> str:
+        # "Level 3   7x9, 4 boxes   solved in 52"
+        label = level_name
+        if meta is not None:
+            label += "   {}x{}, {} boxes".format(meta.cols, meta.rows, meta.boxes)
+        if progress is not None:
+            label += "   solved in {}".format(progress.best_moves)
+        return label
+
+    def refresh_level_menus(self):
+        # after a filter change or a win: empty the filled category menus,
+        # postcommand refills them when they are next opened
+        for menu in self.category_menus:
+            menu.delete(0, "end")
+            self.filled_menus.discard(str(menu))
+        self.category_menus = []
 
-            for idx, level_name in enumerate(level_names):
-                if idx % levels_per_category == 0:
-                    # if there's a previous submenu, attach it
-                    if levelset_submenu:
-                        levelset_menu.add_cascade(label=category_name, menu=levelset_submenu)
-
-                    # make a new submenu
-                    levelset_submenu = tk.Menu(levelset_menu, tearoff=0)
-                    end_idx = min(idx + levels_per_category - 1, num_levels - 1)
-                    category_name = f"Levels {idx + 1} to {end_idx + 1} ..."
-
-                # add the level command
-                levelset_submenu.add_command(
-                    label=level_name,
-                    command=lambda ls=levelset_name, ln=level_name: on_level_load(ls, ln)
-                )
-
-            # attach the last submenu
-            if levelset_submenu:
-                levelset_menu.add_cascade(label=category_name, menu=levelset_submenu)
-
-            # attach this levelset menu
-            level_menu.add_cascade(label=levelset_name, menu=levelset_menu)
-
-        menubar.add_cascade(label="Level Select", menu=level_menu)       
-    
     def setup_menubar(self):
-        # fetch level data to populate menus
-        data : dict = self.controller.level_loader.get_data()
+        # level data is fetched when the level menu is first opened
+        get_data : callable = self.controller.level_loader.get_data
         on_quit : callable = self.controller.on_quit
         on_level_reload : callable = self.controller.on_level_reload
         on_level_import: callable = self.controller.on_level_import
-        in_levelset_import : callable = self.controller.on_levelset_import
+        on_levelset_import : callable = self.controller.on_levelset_import
+        on_import_cancel : callable = self.controller.on_import_cancel
         on_level_load : callable = self.controller.load_level
+        on_hint : callable = self.controller.on_hint
+        on_replay_solution : callable = self.controller.on_replay_solution
+        on_replay_speed : callable = self.controller.on_replay_speed
+        on_toggle_overlay : callable = self.controller.on_toggle_overlay
+        on_dump_timings : callable = self.controller.on_dump_timings
+        on_next_level : callable = self.controller.on_next_level
+        on_prev_level : callable = self.controller.on_prev_level
 
         # setup menu
         menubar = tk.Menu(self.root)
@@ -80,14 +171,32 @@ class MainWindow(tk.Frame):
         file_menu = tk.Menu(menubar, tearoff=0)
 
         file_menu.add_command(label="Reload Current Level (Ctrl+N)", command=lambda: on_level_reload() )
-        file_menu.add_command(label="Import Level", command=lambda: on_level_import)
-        file_menu.add_command(label="Import Levelset", command=lambda: on_levelset_import)
+        file_menu.add_command(label="Next Level (Page Down)", command=lambda: on_next_level() )
+        file_menu.add_command(label="Previous Level (Page Up)", command=lambda: on_prev_level() )
+        file_menu.add_command(label="Hint (Ctrl+H)", command=lambda: on_hint() )
+        file_menu.add_command(label="Replay Best Solution (Ctrl+R)", command=lambda: on_replay_solution() )
+        file_menu.add_command(label="Replay Best Solution, Turbo", command=lambda: on_replay_solution(turbo=True) )
+
+        speed_menu = tk.Menu(file_menu, tearoff=0)
+        for speed in REPLAY_SPEEDS:
+            speed_menu.add_radiobutton(label="{} moves/s".format(speed), value=speed, variable=self.replay_speed,
+                                       command=lambda: on_replay_speed(self.replay_speed.get()))
+        file_menu.add_cascade(label="Replay Speed", menu=speed_menu)
+        file_menu.add_command(label="Import Level", command=lambda: on_level_import() )
+        file_menu.add_command(label="Import Levelset (.xsb .sok .slc)", command=lambda: on_levelset_import() )
+        file_menu.add_command(label="Cancel Import", command=lambda: on_import_cancel() )
         file_menu.add_command(label="Exit (Escape)", command=lambda: on_quit() )
         menubar.add_cascade(label="File", menu=file_menu)
         
         # level select
-        self.build_level_menu(menubar, data, on_level_load, levels_per_category=20)
+        self.build_level_menu(menubar, get_data, on_level_load, levels_per_category=20)
         
+        # debug menu
+        debug_menu = tk.Menu(menubar, tearoff=0)
+        debug_menu.add_command(label="Toggle Timing Overlay (F3)", command=lambda: on_toggle_overlay() )
+        debug_menu.add_command(label="Dump Timings to JSON", command=lambda: on_dump_timings() )
+        menubar.add_cascade(label="Debug", menu=debug_menu)
+
         # about menu
         about_menu =  tk.Menu(menubar, tearoff=0)
         about_menu.add_command(label="Open About", command=lambda: self.about_popup.trigger() )
@@ -98,9 +207,15 @@ class MainWindow(tk.Frame):
         on_quit : callable = self.controller.on_quit
         on_zoom_in : callable = self.controller.on_zoom_in 
         on_zoom_out : callable = self.controller.on_zoom_out 
+        on_fit_window : callable = self.controller.on_fit_window
         on_level_reload : callable = self.controller.on_level_reload
         on_undo_move : callable = self.controller.on_undo_move
         on_redo_move : callable = self.controller.on_redo_move
+        on_hint : callable = self.controller.on_hint
+        on_replay_solution : callable = self.controller.on_replay_solution
+        on_toggle_overlay : callable = self.controller.on_toggle_overlay
+        on_next_level : callable = self.controller.on_next_level
+        on_prev_level : callable = self.controller.on_prev_level
 
         self.root.bind('<w>', lambda event: on_make_move('w') )
         self.root.bind('<a>', lambda event: on_make_move('a') )
@@ -112,7 +227,13 @@ class MainWindow(tk.Frame):
         self.root.bind('<Control-n>', lambda event: on_level_reload() )
         self.root.bind('<Control-z>', lambda event:on_undo_move() )
         self.root.bind('<Control-y>', lambda event:on_redo_move() )
+        self.root.bind('<Control-h>', lambda event: on_hint() )
+        self.root.bind('<Control-r>', lambda event: on_replay_solution() )
+        self.root.bind('<F3>', lambda event: on_toggle_overlay() )
+        self.root.bind('<Next>', lambda event: on_next_level() )
+        self.root.bind('<Prior>', lambda event: on_prev_level() )
         
         self.root.bind('<Control-equal>', lambda event: on_zoom_in() )
         self.root.bind('<Control-minus>', lambda event: on_zoom_out() )
+        self.root.bind('<Control-0>', lambda event: on_fit_window() )
 
@@ -3,6 +3,10 @@
 import tkinter as tk
 from abc import ABC, abstractmethod 
 
+from instrumentation import get_logger
+
+log = get_logger("ui")
+
 class AbstractPopup(ABC):
     def __init__(self, root, controller):
         self.root = root 
@@ -37,7 +41,7 @@ class AboutPopup(AbstractPopup):
         super().__init__(root, controller)
 
     def trigger(self):
-        print("AboutPopup Opened")
+        log.debug("AboutPopup opened")
         popup = tk.Toplevel(self.root)
         popup.title("About Window")
         popup.geometry("500x400")
@@ -65,9 +69,17 @@ class AboutPopup(AbstractPopup):
 
         msg = '\n'.join([
             'WASD   : Movement',
+            'CLICK  : Walk to a cell, or pick a box then its target',
             'CTRL - : Zoom out',
             'CTRL = : Zoom in',
+            'CTRL 0 : Fit board to window',
+            'WHEEL  : Scroll large boards (SHIFT for sideways)',
             'CTRL N : Reset puzzle',
+            'PG DN  : Next level',
+            'PG UP  : Previous level',
+            'CTRL H : Hint (plays the next push)',
+            'CTRL R : Replay best solution',
+            'F3     : Debug overlay',
             'ESCAPE : Quit program'
         ])
         label_4 = tk.Label(popup, text=msg, font="TkFixedFont", anchor="w", justify="left")
@@ -82,7 +94,7 @@ class WinPopup(AbstractPopup):
         super().__init__(root, controller)
 
     def trigger(self):
-        print("WinPopup Opened")
+        log.debug("WinPopup opened")
         popup = tk.Toplevel(self.root)
         popup.title("Game over")
         popup.geometry("300x200")
@@ -1,14 +1,129 @@
 # progres_manager.py
 
+# Level progress kept in SQLite. Everything is read once at startup with a
+# single query into self.data; wins update self.data right away and are queued
+# for a writer thread, which commits them in batches inside one transaction.
+# The UI thread never waits on the disk.
+
 import os
-import json 
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    levelset     TEXT NOT NULL,
+    level        TEXT NOT NULL,
+    best_moves   INTEGER NOT NULL,
+    best_pushes  INTEGER NOT NULL,
+    solution     TEXT NOT NULL,
+    first_solved REAL NOT NULL,
+    last_solved  REAL NOT NULL,
+    PRIMARY KEY (levelset, level)
+)
+"""
+
+# keeps the shortest solution, the lowest push count and the first solve time
+UPSERT = """
+INSERT INTO progress VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (levelset, level) DO UPDATE SET
+    solution = CASE WHEN excluded.best_moves < best_moves THEN excluded.solution ELSE solution END,
+    best_moves = MIN(best_moves, excluded.best_moves),
+    best_pushes = MIN(best_pushes, excluded.best_pushes),
+    last_solved = excluded.last_solved
+"""
+
+@dataclass
+class LevelProgress:
+    best_moves: int
+    best_pushes: int
+    solution: str
+    first_solved: float
+    last_solved: float
 
 class ProgressManager:
-    def __init__(self):
+    def __init__(self, db_path="progress.db", batch_size=64, flush_interval=0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # (levelset, levelname) -> LevelProgress
         self.data = {}
+        self.load_progress()
+
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, name="ProgressManager.writer", daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+        return conn
+
+    def load_progress(self):
         # load previous data
+        if not os.path.isfile(self.db_path):
+            return
+
+        conn = self.connect()
+        try:
+            for row in conn.execute("SELECT * FROM progress"):
+                self.data[(row[0], row[1])] = LevelProgress(*row[2:])
+        finally:
+            conn.close()
+
+    def save_progress(self, levelset: str, levelname: str, num_moves: int, num_pushes: int = 0, solution: str = ""):
+        now = time.time()
+        key = (levelset, levelname)
+
+        old = self.data.get(key)
+        if old is None:
+            self.data[key] = LevelProgress(num_moves, num_pushes, solution, now, now)
+        else:
+            if num_moves < old.best_moves:
+                old.best_moves = num_moves
+                old.solution = solution
+            old.best_pushes = min(old.best_pushes, num_pushes)
+            old.last_solved = now
+
+        self.pending.put((levelset, levelname, num_moves, num_pushes, solution, now, now))
+
+    def get_progress(self, levelset: str, levelname: str):
+        return self.data.get((levelset, levelname))
+
+    def write_loop(self):
+        conn = self.connect()
+        running = True
+        while running:
+            record = self.pending.get()
+            if record is None:
+                break
+
+            # gather whatever else arrives within flush_interval
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = self.pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if record is None:
+                    running = False
+                    break
+                batch.append(record)
 
-    def save_progress(self, levelset: str, levelname: str, num_moves: int):
-        # save data to json file
-        pass
+            # one transaction per batch: all of it lands or none of it does
+            with conn:
+                conn.executemany(UPSERT, batch)
+        conn.close()
 
+    def close(self):
+        # flush anything queued and stop the writer
+        self.pending.put(None)
+        self.writer.join()
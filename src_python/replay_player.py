@@ -0,0 +1,76 @@
+# replay_player.py
+
+# Plays a solution back on the canvas, one frame per root.after tick. Moves
+# are applied straight to the engine and the canvas is updated once per frame
+# with whatever cells changed, so the frame rate stays the same however long
+# the solution is.
+#
+# normal: moves are due at `speed` per second; when a frame runs late the
+#         next frame applies every move that has come due (frames are skipped,
+#         moves never are)
+# turbo:  each frame applies as many moves as fit in most of the frame budget
+
+import time
+
+FRAME_MS = 16
+
+class ReplayPlayer:
+    def __init__(self, root, controller):
+        self.root = root
+        self.controller = controller
+
+        self.moves = ""
+        self.idx = 0
+        self.speed = 20.0
+        self.turbo = False
+        self.start_time = 0.0
+        self.after_id = None
+
+    def start(self, moves: str, speed=20.0, turbo=False):
+        # moves are engine keys (wasd), as from lurd_to_wasd()
+        self.stop()
+        self.moves = moves
+        self.idx = 0
+        self.speed = speed
+        self.turbo = turbo
+        self.start_time = time.perf_counter()
+        self.after_id = self.root.after(FRAME_MS, self.step)
+
+    def set_speed(self, speed: float):
+        # keeps the moves already played, later ones come due at the new rate
+        self.start_time = time.perf_counter() - self.idx / speed
+        self.speed = speed
+
+    def is_playing(self) -> bool:
+        return self.after_id is not None
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def step(self):
+        frame_start = time.perf_counter()
+        engine = self.controller.engine
+
+        if self.turbo:
+            deadline = frame_start + 0.75 * FRAME_MS / 1000
+            while self.idx < len(self.moves) and time.perf_counter() < deadline:
+                engine.make_move(self.moves[self.idx])
+                self.idx += 1
+        else:
+            due = min(len(self.moves), int((frame_start - self.start_time) * self.speed) + 1)
+            while self.idx < due:
+                engine.make_move(self.moves[self.idx])
+                self.idx += 1
+
+        # one canvas update per frame, however many moves were applied
+        self.controller.on_update()
+
+        if self.idx >= len(self.moves):
+            self.after_id = None
+            self.controller.on_replay_finished()
+            return
+
+        spent_ms = int(1000 * (time.perf_counter() - frame_start))
+        self.after_id = self.root.after(max(1, FRAME_MS - spent_ms), self.step)
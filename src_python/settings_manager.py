@@ -2,6 +2,14 @@
 
 from dataclasses import dataclass 
 
+MIN_TILE_SIZE = 10
+MAX_TILE_SIZE = 100
+TILE_SIZE_STEP = 5
+
+# solution replay speeds offered in the menu, in moves per second
+REPLAY_SPEEDS = (5, 10, 20, 40, 80)
+DEFAULT_REPLAY_SPEED = 20
+
 @dataclass
 class Theme:
     tile_light: str
@@ -17,6 +25,13 @@ class SettingsManager:
     def __init__(self):
         self.tile_size = 50 
 
+        # the tile size follows the window (fit_tile_size) until the player
+        # zooms by hand
+        self.auto_fit = True
+
+        # moves per second for File > Replay Best Solution
+        self.replay_speed = DEFAULT_REPLAY_SPEED
+
         self.themes = [] 
         self.current_theme = None 
 
@@ -27,10 +42,37 @@ class SettingsManager:
         self.current_theme = self.themes[0] 
 
     def on_tile_increase(self):
-        self.tile_size = min(100, self.tile_size + 5)
+        self.auto_fit = False
+        self.tile_size = min(MAX_TILE_SIZE, self.tile_size + TILE_SIZE_STEP)
 
     def on_tile_decrease(self):
-        self.tile_size = max(10, self.tile_size - 5)
+        self.auto_fit = False
+        self.tile_size = max(MIN_TILE_SIZE, self.tile_size - TILE_SIZE_STEP)
+
+    def on_replay_speed(self, speed: int):
+        self.replay_speed = speed
+
+    def on_fit_window(self):
+        self.auto_fit = True
+
+        # moves per second for File > Replay Best Solution
+        self.replay_speed = DEFAULT_REPLAY_SPEED
+
+    def tile_size_for(self, num_rows: int, num_cols: int, width: int, height: int) -> int:
+        # largest zoom step that shows the whole board in width x height;
+        # boards too big even at MIN_TILE_SIZE get MIN_TILE_SIZE and scroll
+        if not self.auto_fit or num_rows <= 0 or num_cols <= 0:
+            return self.tile_size
+        fit = min(width // num_cols, height // num_rows)
+        fit -= fit % TILE_SIZE_STEP
+        return max(MIN_TILE_SIZE, min(MAX_TILE_SIZE, fit))
+
+    def fit_tile_size(self, num_rows: int, num_cols: int, width: int, height: int):
+        self.tile_size = self.tile_size_for(num_rows, num_cols, width, height)
+
+    def get_tile_sizes(self):
+        # every tile size reachable by zooming
+        return list(range(MIN_TILE_SIZE, MAX_TILE_SIZE + 1, TILE_SIZE_STEP))
 
     def get_state(self) -> "SettingsState":
         return SettingsState(self.tile_size, self.current_theme)
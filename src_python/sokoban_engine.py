@@ -2,192 +2,612 @@
 
 # '_' empty
 # '#' wall
-# '.' place 
+# '.' place
 # '$' box
-# '*' box on place 
+# '*' box on place
 # '@' player
 # '+' player on place
-# ';' end of current row 
+# ';' end of current row
 
-# TODO 
-# a move that doesn't push a block is lowercase wasd
-# a move that does push a block is uppercase WASD
+# The board is stored as flat bytearrays indexed by (row * num_cols + col),
+# one byte per cell for each of walls, goals and boxes. The player index and
+# the number of boxes sitting on goals are cached, so moves and win checks
+# never rescan the grid.
 
+# Move history is a bytearray with one byte per move: the direction code in
+# the low two bits and a push flag above it. It exports to and imports from
+# LURD notation (lowercase walk, uppercase push), optionally run-length
+# encoded as in "3r2U".
+
+import logging
+import random
 from dataclasses import dataclass
 from typing import List
 
-@dataclass 
-class Tile:
-    is_player: bool
-    is_wall: bool
-    is_box: bool
-    is_solution_spot: bool
+from deadlocks import DeadlockTable
+from instrumentation import get_logger
+
+log = get_logger("engine")
 
-@dataclass 
+@dataclass
 class BoardState:
     num_rows: int
-    num_cols: int 
-    grid: List[List["Tile"]]
+    num_cols: int
+    walls: bytearray
+    goals: bytearray
+    boxes: bytearray
+    player: int
 
-@dataclass
-class Move:
-    direction: str
-    pushed: bool 
+    def index(self, row: int, col: int) -> int:
+        return row * self.num_cols + col
+
+# (row delta, col delta) for each move key
+DIRECTIONS = {'w': (-1, 0), 's': (1, 0), 'a': (0, -1), 'd': (0, 1)}
+
+# move history byte layout
+DIRECTION_CODES = {'w': 0, 's': 1, 'a': 2, 'd': 3}
+CODE_DIRECTIONS = "wsad"
+PUSH_FLAG = 4
+
+# standard LURD solution notation -> engine move keys
+LURD_TO_WASD = {'l': 'a', 'u': 'w', 'r': 'd', 'd': 's'}
+WASD_TO_LURD = {v: k for k, v in LURD_TO_WASD.items()}
+
+def lurd_to_wasd(moves: str) -> str:
+    # pushes keep their uppercase letter
+    out = []
+    for m in moves:
+        key = LURD_TO_WASD[m.lower()]
+        out.append(key.upper() if m.isupper() else key)
+    return "".join(out)
+
+def compress_lurd(moves: str) -> str:
+    # "rrrUU" -> "3r2U"
+    out = []
+    i = 0
+    while i < len(moves):
+        j = i
+        while j < len(moves) and moves[j] == moves[i]:
+            j += 1
+        run = j - i
+        out.append("{}{}".format(run, moves[i]) if run > 1 else moves[i])
+        i = j
+    return "".join(out)
+
+def expand_lurd(moves: str) -> str:
+    # "3r2U" -> "rrrUU"; plain LURD passes through unchanged
+    out = []
+    count = 0
+    for ch in moves:
+        if ch.isdigit():
+            count = count * 10 + int(ch)
+        elif ch.lower() in LURD_TO_WASD:
+            out.append(ch * max(count, 1))
+            count = 0
+        elif not ch.isspace():
+            raise ValueError("invalid LURD character '{}'".format(ch))
+    return "".join(out)
+
+# Zobrist keys per flat cell index. Each table has its own fixed-seed generator
+# and only ever grows, so a cell's key is the same in every process and for
+# every level, whatever order the tables were grown in.
+ZOBRIST_BOX = []
+ZOBRIST_PLAYER = []
+_zobrist_rngs = (random.Random(0x5b0c0b), random.Random(0x91a7e5))
+
+def zobrist_tables(size: int):
+    for table, rng in zip((ZOBRIST_BOX, ZOBRIST_PLAYER), _zobrist_rngs):
+        while len(table) < size:
+            table.append(rng.getrandbits(64))
+    return ZOBRIST_BOX, ZOBRIST_PLAYER
+
+def parse_level(level_data: str) -> "BoardState":
+    rows = level_data.strip(';').split(';')
+    num_rows = len(rows)
+    num_cols = 1
+
+    for row in rows:
+        num_cols = max(num_cols, len(row) )
+
+    size = num_rows * num_cols
+    walls = bytearray(size)
+    goals = bytearray(size)
+    boxes = bytearray(size)
+    player = -1
+
+    for i, row in enumerate(rows):
+        for j, char in enumerate(row):
+            idx = i * num_cols + j
+            if char == '#':
+                walls[idx] = 1
+            elif char == '.':
+                goals[idx] = 1
+            elif char == '$':
+                boxes[idx] = 1
+            elif char == '*':
+                boxes[idx] = 1
+                goals[idx] = 1
+            elif char == '@':
+                player = idx
+            elif char == '+':
+                player = idx
+                goals[idx] = 1
+            else:
+                pass
+
+    return BoardState(num_rows, num_cols, walls, goals, boxes, player)
+
+def flood_region(walls, boxes, num_cols: int, start: int):
+    # (mask of the cells the player can walk to from start, smallest of them)
+    size = len(walls)
+    region = bytearray(size)
+    region[start] = 1
+    stack = [start]
+    lowest = start
+    while stack:
+        cur = stack.pop()
+        j = cur % num_cols
+        for nb in (cur - num_cols if cur >= num_cols else -1,
+                   cur + num_cols if cur + num_cols < size else -1,
+                   cur - 1 if j > 0 else -1,
+                   cur + 1 if j < num_cols - 1 else -1):
+            if nb >= 0 and not region[nb] and not walls[nb] and not boxes[nb]:
+                region[nb] = 1
+                stack.append(nb)
+                if nb < lowest:
+                    lowest = nb
+    return region, lowest
 
 @dataclass
+class PreparedLevel:
+    # everything new_game derives from a level before play starts: the
+    # parsed board, the deadlock tables and the starting reachable region.
+    # Built off the Tk thread by the level prefetcher and never mutated.
+    board_state: BoardState
+    deadlocks: DeadlockTable
+    region: bytes
+    player_norm: int
+
+def prepare_level(level_data: str) -> PreparedLevel:
+    bs = parse_level(level_data)
+    deadlocks = DeadlockTable(bs)
+    region, lowest = (b"", -1)
+    if bs.player >= 0:
+        region, lowest = flood_region(bs.walls, bs.boxes, bs.num_cols, bs.player)
+    return PreparedLevel(bs, deadlocks, bytes(region), lowest)
+
 class SokobanEngine:
     def __init__(self):
-        self.grid: List[List["Tile"]] = []
-        self.move_history: List["Move"] = []
-        self.move_idx: int = 0 
-
-    def new_game(self, level_data: str) -> None:
-        self.grid.clear()
-        self.move_history.clear()
-        self.move_idx = 0 
-
-        rows = level_data.strip(';').split(';')
-        num_rows = len(rows)
-        num_cols = 1
-        
-        for row in rows:
-            num_cols = max(num_cols, len(row) )
-
-        self.grid = [ [Tile(False, False, False, False) for j in range(num_cols)] for i in range(num_rows) ] 
-        
-        for i, row in enumerate(rows):
-            for j, char in enumerate(row):
-                g = self.grid[i][j]
-                if char == '#':
-                    g.is_wall = True
-                elif char == '.':
-                    g.is_solution_spot = True
-                elif char == '$':
-                    g.is_box = True
-                elif char == '*':
-                    g.is_box = True
-                    g.is_solution_spot = True
-                elif char == '@':
-                    g.is_player = True
-                elif char == '+':
-                    g.is_player = True
-                    g.is_solution_spot = True
-                else:
-                    pass
-        self.print_grid()
-        print()
-    
+        self.num_rows: int = 0
+        self.num_cols: int = 0
+        self.walls = bytearray()
+        self.goals = bytearray()
+        self.boxes = bytearray()
+        self.player: int = -1
+        self.num_goals: int = 0
+        self.boxes_on_goals: int = 0
+        self.deadlocks = None
+        self.deadlocked: bool = False
+
+        self.move_history = bytearray()
+        self.move_idx: int = 0
+
+        # cells changed since the last pop_dirty_cells(), for incremental redraws
+        self.dirty_cells = set()
+
+        # incremental zobrist hash of the box layout, and the smallest cell of
+        # the player's reachable region (None until asked for after a push)
+        self.box_hash: int = 0
+        self.player_norm = None
+
+        # cells the player can walk to, as a bytearray mask; only a box move
+        # can change it, so it is rebuilt lazily after pushes
+        self.region = None
+
+        # the start position, kept so restart() skips parsing and the
+        # deadlock tables
+        self.start_boxes = b""
+        self.start_player: int = -1
+
+    def new_game(self, level_data: str, prepared=None) -> None:
+        # prepared is a PreparedLevel for the same level_data, if one was
+        # built in the background
+        if prepared is None:
+            prepared = prepare_level(level_data)
+
+        bs = prepared.board_state
+        self.num_rows = bs.num_rows
+        self.num_cols = bs.num_cols
+        self.walls = bs.walls
+        self.goals = bs.goals
+        self.num_goals = sum(self.goals)
+        self.deadlocks = prepared.deadlocks
+
+        self.start_boxes = bytes(bs.boxes)
+        self.start_player = bs.player
+        self.restart()
+        if prepared.player_norm >= 0:
+            self.region = bytearray(prepared.region)
+            self.player_norm = prepared.player_norm
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("new game %dx%d\n%s", self.num_rows, self.num_cols, self.grid_text())
+
+    def restart(self) -> None:
+        # back to the start position of the current level, history cleared
+        self.move_history = bytearray()
+        self.move_idx = 0
+        self.dirty_cells.clear()
+
+        self.boxes = bytearray(self.start_boxes)
+        self.player = self.start_player
+        self.boxes_on_goals = sum(b & g for b, g in zip(self.boxes, self.goals))
+        self.deadlocked = self._scan_deadlocks()
+
+        zobrist_box, _ = zobrist_tables(len(self.boxes))
+        self.box_hash = 0
+        for idx, box in enumerate(self.boxes):
+            if box:
+                self.box_hash ^= zobrist_box[idx]
+        self.player_norm = None
+        self.region = None
+
     def print_grid(self):
-        bs = self.get_board_state() 
-        for i in range(bs.num_rows):
-            for j in range(bs.num_cols):
-                g = self.grid[i][j] 
+        print(self.grid_text())
+
+    def grid_text(self) -> str:
+        lines = []
+        for i in range(self.num_rows):
+            line = []
+            for j in range(self.num_cols):
+                idx = i * self.num_cols + j
+                is_goal = self.goals[idx]
                 sym = '.'
-                if g.is_wall: 
+                if self.walls[idx]:
                     sym = '#'
-                elif g.is_player:
-                    sym = 'P' if g.is_solution_spot else 'p'
-                elif g.is_box:
-                    sym = 'B' if g.is_solution_spot else 'b'
+                elif idx == self.player:
+                    sym = 'P' if is_goal else 'p'
+                elif self.boxes[idx]:
+                    sym = 'B' if is_goal else 'b'
+                else:
+                    sym = '*' if is_goal else '.'
+                line.append(sym)
+            lines.append(" ".join(line))
+        return "\n".join(lines)
+
+    def get_level_data(self) -> str:
+        # the current position in the level_data format new_game reads
+        rows = []
+        for i in range(self.num_rows):
+            row = []
+            for j in range(self.num_cols):
+                idx = i * self.num_cols + j
+                is_goal = self.goals[idx]
+                if self.walls[idx]:
+                    row.append('#')
+                elif idx == self.player:
+                    row.append('+' if is_goal else '@')
+                elif self.boxes[idx]:
+                    row.append('*' if is_goal else '$')
                 else:
-                    sym = '*' if g.is_solution_spot else '.'
-                print(sym, end=" ")
-            print()
-    
+                    row.append('.' if is_goal else '_')
+            rows.append("".join(row) + ';')
+        return "".join(rows)
+
     def get_player_pos(self):
-        bs = self.get_board_state() 
-        for i in range(bs.num_rows):
-            for j in range(bs.num_cols):
-                g = self.grid[i][j] 
-                if g.is_player:
-                    return [i, j]
-        return [-1, -1]
-    
-    def make_move(self, move: str, truncate=True):
-        px, py = self.get_player_pos()
+        if self.player < 0:
+            return [-1, -1]
+        return list(divmod(self.player, self.num_cols))
+
+    def _neighbor(self, idx: int, di: int, dj: int) -> int:
+        # index of the cell next to idx in direction (di, dj), or -1 if off the board
+        i, j = divmod(idx, self.num_cols)
+        i += di
+        j += dj
+        if not (0 <= i < self.num_rows and 0 <= j < self.num_cols):
+            return -1
+        return i * self.num_cols + j
 
-        directions = {'w': (-1, 0), 's': (1, 0), 'a': (0, -1), 'd': (0, 1)}
-        if move.lower() not in directions:
+    def _move_box(self, src: int, dst: int):
+        self.boxes[src] = 0
+        self.boxes[dst] = 1
+        self.boxes_on_goals += self.goals[dst] - self.goals[src]
+        self.box_hash ^= ZOBRIST_BOX[src] ^ ZOBRIST_BOX[dst]
+        # walking never changes the reachable region, pushing can
+        self.player_norm = None
+        self.region = None
+        self.dirty_cells.add(src)
+        self.dirty_cells.add(dst)
+
+    def make_move(self, move: str, truncate=True):
+        move = move.lower()
+        if move not in DIRECTIONS or self.player < 0:
             return
 
-        di, dj = directions[move.lower()]
-        adj1 = [px + di, py + dj]
-        adj2 = [px + 2*di, py + 2*dj]
+        di, dj = DIRECTIONS[move]
+        adj1 = self._neighbor(self.player, di, dj)
 
         # Bounds check
-        if not (0 <= adj1[0] < len(self.grid) and 0 <= adj1[1] < len(self.grid[0])):
+        if adj1 < 0 or self.walls[adj1]:
             return
 
-        g1 = self.grid[adj1[0]][adj1[1]]
-        g2 = self.grid[adj2[0]][adj2[1]] if (0 <= adj2[0] < len(self.grid) and 0 <= adj2[1] < len(self.grid[0])) else None
-
         pushed = False
 
-        if g1.is_wall:
-            return
-
-        if g1.is_box:
-            if g2 and not g2.is_wall and not g2.is_box:
-                g2.is_box = True
-                g1.is_box = False
+        if self.boxes[adj1]:
+            adj2 = self._neighbor(adj1, di, dj)
+            if adj2 >= 0 and not self.walls[adj2] and not self.boxes[adj2]:
+                self._move_box(adj1, adj2)
                 pushed = True
+                # a deadlock can only be undone, never pushed out of
+                if not self.deadlocked:
+                    self.deadlocked = self.deadlocks.is_deadlock_after_push(adj2, self.boxes.__getitem__)
             else:
                 return
 
         # Move player
-        self.grid[px][py].is_player = False
-        g1.is_player = True
+        self.dirty_cells.add(self.player)
+        self.dirty_cells.add(adj1)
+        self.player = adj1
 
         # Only record if this is a new move
         if truncate:
             # Remove future redo moves
             del self.move_history[self.move_idx:]
-            self.move_history.append(Move(move.lower(), pushed))
+            self.move_history.append(DIRECTION_CODES[move] | (PUSH_FLAG if pushed else 0))
             self.move_idx += 1
 
+    def _offset(self, code: int) -> int:
+        # flat index step for a direction code; recorded moves are known legal,
+        # so replaying them needs no bounds checks
+        di, dj = DIRECTIONS[CODE_DIRECTIONS[code & 3]]
+        return di * self.num_cols + dj
+
     def undo_move(self):
         if self.move_idx == 0:
             return
 
         self.move_idx -= 1
-        last_move = self.move_history[self.move_idx]
-
-        pi, pj = self.get_player_pos()
-        self.grid[pi][pj].is_player = False
-
-        directions = {'w': (-1,0), 's': (1,0), 'a': (0,-1), 'd': (0,1)}
-        di, dj = directions[last_move.direction]
+        entry = self.move_history[self.move_idx]
+        offset = self._offset(entry)
+        pos = self.player
 
         # Player moves back
-        back_i, back_j = pi - di, pj - dj
-        self.grid[back_i][back_j].is_player = True
+        self.player = pos - offset
+        self.dirty_cells.add(pos)
+        self.dirty_cells.add(self.player)
 
-        if last_move.pushed:
+        if entry & PUSH_FLAG:
             # Move box back
-            box_i, box_j = pi + di, pj + dj
-            self.grid[box_i][box_j].is_box = False
-            self.grid[pi][pj].is_box = True
+            self._move_box(pos + offset, pos)
+            if self.deadlocked:
+                self.deadlocked = self._scan_deadlocks()
 
     def redo_move(self):
         if self.move_idx >= len(self.move_history):
             return
 
-        move = self.move_history[self.move_idx]
-        # replay move without recording again
-        self.make_move(move.direction, truncate=False)
+        entry = self.move_history[self.move_idx]
+        offset = self._offset(entry)
+        pos = self.player + offset
+
+        if entry & PUSH_FLAG:
+            self._move_box(pos, pos + offset)
+            if not self.deadlocked:
+                self.deadlocked = self.deadlocks.is_deadlock_after_push(pos + offset, self.boxes.__getitem__)
+
+        self.dirty_cells.add(self.player)
+        self.dirty_cells.add(pos)
+        self.player = pos
         self.move_idx += 1
 
+    def get_solution(self, run_length=False) -> str:
+        # moves played so far in LURD notation, pushes uppercase
+        out = []
+        for entry in self.move_history[:self.move_idx]:
+            letter = WASD_TO_LURD[CODE_DIRECTIONS[entry & 3]]
+            out.append(letter.upper() if entry & PUSH_FLAG else letter)
+        moves = "".join(out)
+        return compress_lurd(moves) if run_length else moves
+
+    def play_solution(self, moves: str) -> int:
+        # replays LURD (plain or run-length) from the current position and
+        # returns how many moves were applied before the first illegal one
+        applied = 0
+        for key in lurd_to_wasd(expand_lurd(moves)):
+            before = self.move_idx
+            self.make_move(key)
+            if self.move_idx == before:
+                break
+            applied += 1
+        return applied
+
+    def verify_solution(self, moves: str):
+        # replays expanded LURD from the start position on a scratch copy of
+        # the boxes, skipping history, hashes, deadlock checks and dirty
+        # cells; the engine itself is left untouched. Case is not checked,
+        # pushes are counted from the board. Returns (moves applied before
+        # the first illegal one, pushes, solved).
+        walls = self.walls
+        goals = self.goals
+        boxes = bytearray(self.start_boxes)
+        size = len(walls)
+        cols = self.num_cols
+        steps = {'l': -1, 'u': -cols, 'r': 1, 'd': cols,
+                 'L': -1, 'U': -cols, 'R': 1, 'D': cols}
+
+        player = self.start_player
+        col = player % cols
+        on_goals = sum(b & g for b, g in zip(boxes, goals))
+        pushes = 0
+        applied = 0
+        for m in moves:
+            step = steps.get(m)
+            if step is None or player < 0:
+                break
+            if step == 1 or step == -1:
+                new_col = col + step
+                if new_col < 0 or new_col >= cols:
+                    break
+            else:
+                new_col = col
+            nxt = player + step
+            if nxt < 0 or nxt >= size or walls[nxt]:
+                break
+
+            if boxes[nxt]:
+                beyond = nxt + step
+                if (step == 1 or step == -1) and not 0 <= new_col + step < cols:
+                    break
+                if beyond < 0 or beyond >= size or walls[beyond] or boxes[beyond]:
+                    break
+                boxes[nxt] = 0
+                boxes[beyond] = 1
+                on_goals += goals[beyond] - goals[nxt]
+                pushes += 1
+
+            player = nxt
+            col = new_col
+            applied += 1
+
+        return applied, pushes, on_goals == self.num_goals
+
+    def _scan_deadlocks(self) -> bool:
+        has_box = self.boxes.__getitem__
+        for idx, box in enumerate(self.boxes):
+            if box and not self.goals[idx] and self.deadlocks.is_deadlock_after_push(idx, has_box):
+                return True
+        return False
+
+    def is_dead_square(self, row: int, col: int) -> bool:
+        return self.deadlocks.is_dead_square(row * self.num_cols + col)
+
+    def is_deadlocked(self) -> bool:
+        return self.deadlocked
+
+    def _steps(self, cur: int):
+        # (move key, neighbor index) for each on-board neighbor of cur
+        cols = self.num_cols
+        j = cur % cols
+        if cur >= cols:
+            yield 'w', cur - cols
+        if cur + cols < len(self.walls):
+            yield 's', cur + cols
+        if j > 0:
+            yield 'a', cur - 1
+        if j < cols - 1:
+            yield 'd', cur + 1
+
+    def reachable_region(self) -> bytearray:
+        if self.region is not None:
+            return self.region
+
+        region, lowest = flood_region(self.walls, self.boxes, self.num_cols, self.player)
+        self.region = region
+        self.player_norm = lowest
+        return region
+
+    def _normalized_player(self) -> int:
+        if self.player_norm is None:
+            self.reachable_region()
+        return self.player_norm
+
+    def _walk_path(self, start: int, goal: int, box_from: int = -1, box_to: int = -1):
+        # shortest walk as move keys, or None; the box on box_from is treated
+        # as if it stood on box_to
+        if start == goal:
+            return ""
+        came_from = {start: None}
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for cur in frontier:
+                for key, nb in self._steps(cur):
+                    if nb in came_from or self.walls[nb] or nb == box_to:
+                        continue
+                    if self.boxes[nb] and nb != box_from:
+                        continue
+                    came_from[nb] = (cur, key)
+                    if nb == goal:
+                        path = []
+                        while came_from[nb] is not None:
+                            nb, key = came_from[nb]
+                            path.append(key)
+                        return "".join(reversed(path))
+                    next_frontier.append(nb)
+            frontier = next_frontier
+        return None
+
+    def find_path(self, goal: int):
+        # move keys that walk the player to goal without pushing, or None
+        if goal < 0 or goal >= len(self.walls) or not self.reachable_region()[goal]:
+            return None
+        return self._walk_path(self.player, goal)
+
+    def find_push_path(self, box: int, goal: int):
+        # move keys that push the box on `box` to `goal` with the fewest
+        # pushes, leaving every other box alone, or None
+        if not self.boxes[box] or goal < 0 or goal >= len(self.walls):
+            return None
+        if box == goal:
+            return ""
+
+        # search over (box cell, player cell) right after each push
+        start = (box, self.player)
+        came_from = {start: None}
+        frontier = [start]
+        found = None
+        while frontier and found is None:
+            next_frontier = []
+            for state in frontier:
+                box_pos, player = state
+                for key, front in self._steps(box_pos):
+                    behind = box_pos - (front - box_pos)
+                    if behind < 0 or behind >= len(self.walls) or self.walls[front] or self.walls[behind]:
+                        continue
+                    if (self.boxes[front] and front != box) or (self.boxes[behind] and behind != box):
+                        continue
+                    if abs(behind % self.num_cols - box_pos % self.num_cols) > 1:
+                        continue
+                    new_state = (front, box_pos)
+                    if new_state in came_from:
+                        continue
+                    walk = self._walk_path(player, behind, box, box_pos)
+                    if walk is None:
+                        continue
+                    came_from[new_state] = (state, walk + key)
+                    if front == goal:
+                        found = new_state
+                        break
+                    next_frontier.append(new_state)
+                if found is not None:
+                    break
+            frontier = next_frontier
+
+        if found is None:
+            return None
+        path = []
+        state = found
+        while came_from[state] is not None:
+            state, moves = came_from[state]
+            path.append(moves)
+        return "".join(reversed(path))
+
+    def position_hash(self) -> int:
+        # exact position: box layout and the player's own cell
+        return self.box_hash ^ ZOBRIST_PLAYER[self.player]
+
+    def state_key(self) -> int:
+        # positions that differ only by where the player walked to share a key;
+        # matches the solver's transposition table keys
+        return self.box_hash ^ ZOBRIST_PLAYER[self._normalized_player()]
+
+    def pop_dirty_cells(self) -> List[int]:
+        cells = list(self.dirty_cells)
+        self.dirty_cells.clear()
+        return cells
+
     def is_solved(self) -> bool:
-        bs = self.get_board_state() 
-        for i in range(bs.num_rows):
-            for j in range(bs.num_cols):
-                g = self.grid[i][j] 
-                if (g.is_solution_spot and not g.is_box):
-                    return False
-        return True
-    
-    def get_board_state(self) -> "BoardState":
-        num_rows = len(self.grid)
-        num_cols = len(self.grid[0])
-        return BoardState(num_rows, num_cols, self.grid)
+        return self.boxes_on_goals == self.num_goals
 
+    def get_board_state(self) -> "BoardState":
+        return BoardState(self.num_rows, self.num_cols, self.walls, self.goals, self.boxes, self.player)
@@ -0,0 +1,597 @@
+# solver.py
+
+# A* search over pushes rather than single steps. Every state is a set of box
+# positions plus the player's reachable region, normalized to the smallest
+# cell index the player can reach, so walking around between pushes never
+# creates new states. States are deduplicated with a transposition table
+# keyed by Zobrist hashes, and the heuristic is a lower bound on the box to
+# goal assignment cost measured in pushes. Pushes into dead squares, 2x2
+# blocks and freeze deadlocks are pruned using deadlocks.DeadlockTable.
+#
+# BidirectionalSolver adds a backward search over pulls, started from every
+# box on a goal, and stops as soon as a state is reached from both ends.
+# CompactSolver runs the forward search on packed states in state_store,
+# spilling to memory-mapped files past a memory cap.
+
+import heapq
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from deadlocks import DeadlockTable
+from sokoban_engine import parse_level, zobrist_tables
+from state_store import MemoryBudget, NO_PARENT, PackedHeap, StateCodec, StateTable
+
+INF = 1 << 30
+
+# LURD letters and their (row delta, col delta)
+LURD_DIRECTIONS = (('l', 0, -1), ('u', -1, 0), ('r', 0, 1), ('d', 1, 0))
+OPPOSITE = (2, 3, 0, 1)
+
+@dataclass
+class SolverResult:
+    solution: Optional[str]
+    pushes: int
+    nodes: int
+    elapsed: float
+    status: str  # 'solved', 'unsolvable', 'node_limit' or 'time_limit'
+    # which search found the solution: 'forward', 'backward' or 'meet'
+    direction: str = "forward"
+    backward_nodes: int = 0
+    # CompactSolver only: open + closed set bytes per stored state
+    bytes_per_state: float = 0.0
+    spilled: bool = False
+
+class Solver:
+    def __init__(self, level_data: str, max_nodes: int = 500000, time_limit: float = 30.0,
+                 weight: float = 1.0):
+        # weight > 1 trades push-optimal solutions for a much smaller search
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.weight = weight
+
+        bs = parse_level(level_data)
+        self.num_rows = bs.num_rows
+        self.num_cols = bs.num_cols
+        self.size = bs.num_rows * bs.num_cols
+        self.walls = bs.walls
+        self.player = bs.player
+        self.goals = frozenset(i for i in range(self.size) if bs.goals[i])
+        self.boxes = frozenset(i for i in range(self.size) if bs.boxes[i])
+
+        self.neighbors = self._build_neighbors()
+        self.goal_list = sorted(self.goals)
+        self.goal_dist = [self._pull_distances(g) for g in self.goal_list]
+
+        self.deadlocks = DeadlockTable(bs)
+        self.dead = self.deadlocks.dead
+
+        # shared with the engine, so engine.state_key() matches these hashes
+        self.zobrist_box, self.zobrist_player = zobrist_tables(self.size)
+
+    # board helpers --------------------------------------------------
+    def _build_neighbors(self) -> List[Tuple[int, int, int, int]]:
+        # neighbors[idx][d] is the cell next to idx in LURD direction d, or -1
+        neighbors = []
+        for idx in range(self.size):
+            i, j = divmod(idx, self.num_cols)
+            cells = []
+            for _, di, dj in LURD_DIRECTIONS:
+                ni, nj = i + di, j + dj
+                if 0 <= ni < self.num_rows and 0 <= nj < self.num_cols:
+                    cells.append(ni * self.num_cols + nj)
+                else:
+                    cells.append(-1)
+            neighbors.append(tuple(cells))
+        return neighbors
+
+    def _is_floor(self, idx: int) -> bool:
+        return idx >= 0 and not self.walls[idx]
+
+    def _pull_distances(self, goal: int) -> List[int]:
+        # pushes needed to bring a lone box from each cell onto goal
+        dist = [INF] * self.size
+        dist[goal] = 0
+        queue = deque([goal])
+        while queue:
+            cur = queue.popleft()
+            for d in range(4):
+                # box came from prev, pushed by a player standing at behind
+                prev = self.neighbors[cur][OPPOSITE[d]]
+                if not self._is_floor(prev) or dist[prev] != INF:
+                    continue
+                behind = self.neighbors[prev][OPPOSITE[d]]
+                if not self._is_floor(behind):
+                    continue
+                dist[prev] = dist[cur] + 1
+                queue.append(prev)
+        return dist
+
+    def reachable(self, player: int, boxes) -> List[int]:
+        seen = bytearray(self.size)
+        seen[player] = 1
+        region = [player]
+        stack = [player]
+        while stack:
+            cur = stack.pop()
+            for nb in self.neighbors[cur]:
+                if nb >= 0 and not seen[nb] and not self.walls[nb] and nb not in boxes:
+                    seen[nb] = 1
+                    region.append(nb)
+                    stack.append(nb)
+        return region
+
+    def heuristic(self, boxes) -> int:
+        return self._assignment_bound(boxes, self.goal_dist)
+
+    def _assignment_bound(self, boxes, dist_table) -> int:
+        # both sums are lower bounds on the cheapest box -> target assignment,
+        # dist_table holding one distance list per target
+        goal_side = 0
+        for dist in dist_table:
+            best = min(dist[b] for b in boxes)
+            if best == INF:
+                return INF
+            goal_side += best
+        if len(boxes) != len(dist_table):
+            return goal_side
+
+        box_side = 0
+        for b in boxes:
+            best = min(dist[b] for dist in dist_table)
+            if best == INF:
+                return INF
+            box_side += best
+        return max(goal_side, box_side)
+
+    def hash_boxes(self, boxes) -> int:
+        h = 0
+        for b in boxes:
+            h ^= self.zobrist_box[b]
+        return h
+
+    # search --------------------------------------------------
+    def solve(self) -> "SolverResult":
+        start_time = time.perf_counter()
+
+        if self.player < 0 or not self.goals or len(self.boxes) < len(self.goals):
+            return SolverResult(None, 0, 0, 0.0, "unsolvable")
+
+        boxes = self.boxes
+        region = self.reachable(self.player, boxes)
+        box_hash = self.hash_boxes(boxes)
+        start_hash = box_hash ^ self.zobrist_player[min(region)]
+
+        h = self.heuristic(boxes)
+        if h == INF:
+            return SolverResult(None, 0, 0, time.perf_counter() - start_time, "unsolvable")
+
+        # transposition table: zobrist hash -> best push count seen
+        best_g: Dict[int, int] = {start_hash: 0}
+        # zobrist hash -> (parent hash, box cell pushed, LURD direction)
+        parents: Dict[int, Tuple[int, int, int]] = {}
+
+        counter = 0
+        heap = [(self.weight * h, h, counter, 0, start_hash, box_hash, boxes, self.player)]
+        nodes = 0
+
+        while heap:
+            _, _, _, g, state_hash, box_hash, boxes, player = heapq.heappop(heap)
+            if best_g.get(state_hash, INF) < g:
+                continue
+
+            if self.goals <= boxes:
+                solution = self._build_solution(state_hash, parents)
+                return SolverResult(solution, g, nodes, time.perf_counter() - start_time, "solved")
+
+            nodes += 1
+            if nodes > self.max_nodes:
+                return SolverResult(None, 0, nodes, time.perf_counter() - start_time, "node_limit")
+            if (nodes & 1023) == 0 and time.perf_counter() - start_time > self.time_limit:
+                return SolverResult(None, 0, nodes, time.perf_counter() - start_time, "time_limit")
+
+            for box, d, new_boxes in self._pushes(player, boxes):
+                target = self.neighbors[box][d]
+                if self.deadlocks.is_deadlock_after_push(target, new_boxes.__contains__):
+                    continue
+                new_h = self.heuristic(new_boxes)
+                if new_h == INF:
+                    continue
+
+                # the player ends up where the box was
+                new_box_hash = box_hash ^ self.zobrist_box[box] ^ self.zobrist_box[target]
+                new_region = self.reachable(box, new_boxes)
+                new_hash = new_box_hash ^ self.zobrist_player[min(new_region)]
+                new_g = g + 1
+                if best_g.get(new_hash, INF) <= new_g:
+                    continue
+
+                best_g[new_hash] = new_g
+                parents[new_hash] = (state_hash, box, d)
+                counter += 1
+                heapq.heappush(heap, (new_g + self.weight * new_h, new_h, counter, new_g, new_hash, new_box_hash, new_boxes, box))
+
+        return SolverResult(None, 0, nodes, time.perf_counter() - start_time, "unsolvable")
+
+    def _pushes(self, player: int, boxes):
+        region = self.reachable(player, boxes)
+        in_region = set(region)
+        for box in boxes:
+            for d in range(4):
+                target = self.neighbors[box][d]
+                if not self._is_floor(target) or target in boxes or self.dead[target]:
+                    continue
+                if self.neighbors[box][OPPOSITE[d]] not in in_region:
+                    continue
+                yield box, d, (boxes - {box}) | {target}
+
+    # solution reconstruction --------------------------------------------------
+    def _build_solution(self, state_hash: int, parents) -> str:
+        pushes = []
+        while state_hash in parents:
+            state_hash, box, d = parents[state_hash]
+            pushes.append((box, d))
+        pushes.reverse()
+        return self._moves_for_pushes(pushes)
+
+    def _moves_for_pushes(self, pushes) -> str:
+        # (box cell, LURD direction) pushes from the start position -> LURD
+        moves = []
+        boxes = set(self.boxes)
+        player = self.player
+        for box, d in pushes:
+            moves.append(self._walk(player, self.neighbors[box][OPPOSITE[d]], boxes))
+            moves.append(LURD_DIRECTIONS[d][0].upper())
+            boxes.remove(box)
+            boxes.add(self.neighbors[box][d])
+            player = box
+        return "".join(moves)
+
+    def _walk(self, start: int, target: int, boxes) -> str:
+        # shortest non-pushing path as lowercase LURD letters
+        if start == target:
+            return ""
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            cur = queue.popleft()
+            if cur == target:
+                break
+            for d, nb in enumerate(self.neighbors[cur]):
+                if nb >= 0 and nb not in came_from and not self.walls[nb] and nb not in boxes:
+                    came_from[nb] = (cur, d)
+                    queue.append(nb)
+
+        path = []
+        cur = target
+        while came_from[cur] is not None:
+            cur, d = came_from[cur]
+            path.append(LURD_DIRECTIONS[d][0])
+        path.reverse()
+        return "".join(path)
+
+FORWARD = 0
+BACKWARD = 1
+
+class BidirectionalSolver(Solver):
+    # Forward pushes from the start and backward pulls from the solved
+    # position, on the same board and hashes as Solver. A pull is a push
+    # played in reverse: the player steps away from a box and drags it one
+    # cell. Both searches write to one transposition table, and the first
+    # state found from both ends joins the two halves of the solution. The
+    # side with the smaller open list is expanded next, and max_nodes counts
+    # the nodes of both sides together.
+    def __init__(self, level_data: str, max_nodes: int = 500000, time_limit: float = 30.0,
+                 weight: float = 1.0):
+        super().__init__(level_data, max_nodes, time_limit, weight)
+        # pulls needed to bring a lone box from each cell back to a start cell
+        self.start_dist = [self._push_distances(b) for b in sorted(self.boxes)]
+
+    def _push_distances(self, start: int) -> List[int]:
+        # pushes needed to move a lone box from start to each cell
+        dist = [INF] * self.size
+        dist[start] = 0
+        queue = deque([start])
+        while queue:
+            cur = queue.popleft()
+            for d in range(4):
+                nxt = self.neighbors[cur][d]
+                if not self._is_floor(nxt) or dist[nxt] != INF:
+                    continue
+                if not self._is_floor(self.neighbors[cur][OPPOSITE[d]]):
+                    continue
+                dist[nxt] = dist[cur] + 1
+                queue.append(nxt)
+        return dist
+
+    def backward_heuristic(self, boxes) -> int:
+        return self._assignment_bound(boxes, self.start_dist)
+
+    def _goal_players(self):
+        # normalized player cell of every region next to a box in the solved
+        # position; the last push of any solution leaves the player in one
+        boxes = self.goals
+        seen = bytearray(self.size)
+        for cell in range(self.size):
+            if self.walls[cell] or cell in boxes or seen[cell]:
+                continue
+            region = self.reachable(cell, boxes)
+            for r in region:
+                seen[r] = 1
+            if any(nb in boxes for r in region for nb in self.neighbors[r]):
+                yield min(region)
+
+    def _pulls(self, player: int, boxes):
+        # (box cell, LURD direction, new boxes): the player stands on the
+        # cell next to the box in direction d and steps one further
+        region = set(self.reachable(player, boxes))
+        for box in boxes:
+            for d in range(4):
+                target = self.neighbors[box][d]
+                if target not in region:
+                    continue
+                beyond = self.neighbors[target][d]
+                if not self._is_floor(beyond) or beyond in boxes:
+                    continue
+                yield box, d, (boxes - {box}) | {target}
+
+    def solve(self) -> "SolverResult":
+        if len(self.boxes) != len(self.goals):
+            # the backward search starts with a box on every goal
+            return super().solve()
+
+        start_time = time.perf_counter()
+        if self.player < 0 or not self.goals:
+            return SolverResult(None, 0, 0, 0.0, "unsolvable")
+        if self.goals <= self.boxes:
+            return SolverResult("", 0, 0, 0.0, "solved")
+
+        h = self.heuristic(self.boxes)
+        if h == INF:
+            return SolverResult(None, 0, 0, time.perf_counter() - start_time, "unsolvable")
+
+        # state hash -> [forward entry, backward entry], each entry being
+        # (push count, parent hash, box cell moved, LURD direction) and the
+        # parent None at the roots
+        table: Dict[int, list] = {}
+        heaps = ([], [])
+        counter = 0
+
+        box_hash = self.hash_boxes(self.boxes)
+        start_hash = box_hash ^ self.zobrist_player[min(self.reachable(self.player, self.boxes))]
+        table[start_hash] = [(0, None, -1, -1), None]
+        heaps[FORWARD].append((self.weight * h, h, counter, 0, start_hash, box_hash, self.boxes, self.player))
+
+        goal_box_hash = self.hash_boxes(self.goals)
+        goal_h = self.backward_heuristic(self.goals)
+        for player in self._goal_players():
+            goal_hash = goal_box_hash ^ self.zobrist_player[player]
+            table.setdefault(goal_hash, [None, None])[BACKWARD] = (0, None, -1, -1)
+            counter += 1
+            heaps[BACKWARD].append((self.weight * goal_h, goal_h, counter, 0, goal_hash, goal_box_hash, self.goals, player))
+
+        nodes = [0, 0]
+        while heaps[FORWARD] or heaps[BACKWARD]:
+            if heaps[FORWARD] and (not heaps[BACKWARD] or len(heaps[FORWARD]) <= len(heaps[BACKWARD])):
+                side = FORWARD
+            else:
+                side = BACKWARD
+            _, _, _, g, state_hash, box_hash, boxes, player = heapq.heappop(heaps[side])
+            if table[state_hash][side][0] < g:
+                continue
+
+            nodes[side] += 1
+            total = nodes[FORWARD] + nodes[BACKWARD]
+            if total > self.max_nodes:
+                return SolverResult(None, 0, total, time.perf_counter() - start_time, "node_limit",
+                                    backward_nodes=nodes[BACKWARD])
+            if (total & 1023) == 0 and time.perf_counter() - start_time > self.time_limit:
+                return SolverResult(None, 0, total, time.perf_counter() - start_time, "time_limit",
+                                    backward_nodes=nodes[BACKWARD])
+
+            if side == FORWARD:
+                moves = self._pushes(player, boxes)
+            else:
+                moves = self._pulls(player, boxes)
+
+            for box, d, new_boxes in moves:
+                target = self.neighbors[box][d]
+                if side == FORWARD:
+                    if self.deadlocks.is_deadlock_after_push(target, new_boxes.__contains__):
+                        continue
+                    new_h = self.heuristic(new_boxes)
+                    new_player = box
+                else:
+                    new_h = self.backward_heuristic(new_boxes)
+                    new_player = self.neighbors[target][d]
+                if new_h == INF:
+                    continue
+
+                new_box_hash = box_hash ^ self.zobrist_box[box] ^ self.zobrist_box[target]
+                new_region = self.reachable(new_player, new_boxes)
+                new_hash = new_box_hash ^ self.zobrist_player[min(new_region)]
+                new_g = g + 1
+
+                entry = table.get(new_hash)
+                if entry is None:
+                    entry = table[new_hash] = [None, None]
+                if entry[side] is not None and entry[side][0] <= new_g:
+                    continue
+                entry[side] = (new_g, state_hash, box, d)
+
+                if entry[1 - side] is not None:
+                    return self._joined(new_hash, table, nodes, start_time)
+
+                counter += 1
+                heapq.heappush(heaps[side], (new_g + self.weight * new_h, new_h, counter, new_g,
+                                             new_hash, new_box_hash, new_boxes, new_player))
+
+        total = nodes[FORWARD] + nodes[BACKWARD]
+        return SolverResult(None, 0, total, time.perf_counter() - start_time, "unsolvable",
+                            backward_nodes=nodes[BACKWARD])
+
+    def _joined(self, meet_hash: int, table, nodes, start_time) -> "SolverResult":
+        # forward half: parents back to the start, then reversed
+        pushes = []
+        state_hash = meet_hash
+        while table[state_hash][FORWARD][1] is not None:
+            _, state_hash, box, d = table[state_hash][FORWARD]
+            pushes.append((box, d))
+        pushes.reverse()
+        num_forward = len(pushes)
+
+        # backward half: each pull dragged a box from box to the next cell in
+        # direction d, so played forward that box is pushed back again
+        state_hash = meet_hash
+        while table[state_hash][BACKWARD][1] is not None:
+            _, state_hash, box, d = table[state_hash][BACKWARD]
+            pushes.append((self.neighbors[box][d], OPPOSITE[d]))
+
+        if num_forward == len(pushes):
+            direction = "forward"
+        elif num_forward == 0:
+            direction = "backward"
+        else:
+            direction = "meet"
+
+        return SolverResult(self._moves_for_pushes(pushes), len(pushes), nodes[FORWARD] + nodes[BACKWARD],
+                            time.perf_counter() - start_time, "solved", direction, nodes[BACKWARD])
+
+# heap keys: f * F_SCALE in the top 22 bits, h in the next 10, record id below
+F_SCALE = 16
+F_MAX = (1 << 22) - 1
+H_MAX = (1 << 10) - 1
+
+class CompactSolver(Solver):
+    # The same A* as Solver, with no Python object per state: the open and
+    # closed sets are a PackedHeap and a StateTable sharing one MemoryBudget.
+    # Heap keys order by f, then h, then insertion; a key whose f no longer
+    # matches its record was superseded by a cheaper path and is skipped.
+    def __init__(self, level_data: str, max_nodes: int = 500000, time_limit: float = 30.0,
+                 weight: float = 1.0, memory_cap=None, spill_dir=None):
+        # memory_cap in bytes; None keeps everything in memory
+        super().__init__(level_data, max_nodes, time_limit, weight)
+        self.memory_cap = memory_cap
+        self.spill_dir = spill_dir
+        self.codec = StateCodec(self.size)
+
+    def _key(self, g: int, h: int, rid: int) -> int:
+        f = min(F_MAX, int((g + self.weight * h) * F_SCALE))
+        return (f << 42) | (min(h, H_MAX) << 32) | rid
+
+    def solve(self) -> "SolverResult":
+        start_time = time.perf_counter()
+
+        if self.player < 0 or not self.goals or len(self.boxes) < len(self.goals):
+            return SolverResult(None, 0, 0, 0.0, "unsolvable")
+
+        h = self.heuristic(self.boxes)
+        if h == INF:
+            return SolverResult(None, 0, 0, time.perf_counter() - start_time, "unsolvable")
+
+        budget = MemoryBudget(self.memory_cap, self.spill_dir)
+        table = StateTable(self.codec.state_bytes, budget)
+        heap = PackedHeap(budget)
+        try:
+            result = self._search(table, heap, h, start_time)
+            if table.count:
+                result.bytes_per_state = (table.nbytes + heap.nbytes) / table.count
+            result.spilled = table.spilled or heap.spilled
+            return result
+        finally:
+            table.close()
+            heap.close()
+
+    def _search(self, table: StateTable, heap: PackedHeap, h: int, start_time: float) -> "SolverResult":
+        box_hash = self.hash_boxes(self.boxes)
+        player = min(self.reachable(self.player, self.boxes))
+        state_hash = box_hash ^ self.zobrist_player[player]
+        h = min(h, 0xFFFF)
+        rid = table.add(state_hash, self.codec.pack(self.boxes, player), 0, h, NO_PARENT, 0, 0)
+        heap.push(self._key(0, h, rid))
+        nodes = 0
+
+        while heap:
+            key = heap.pop()
+            rid = key & 0xFFFFFFFF
+            state_hash, g, h, _, _, _ = table.get(rid)
+            if key != self._key(g, h, rid):
+                continue
+
+            boxes, player = self.codec.unpack(table.state(rid))
+            if self.goals <= boxes:
+                return SolverResult(self._build_compact_solution(table, rid), g, nodes,
+                                    time.perf_counter() - start_time, "solved")
+
+            nodes += 1
+            if nodes > self.max_nodes:
+                return SolverResult(None, 0, nodes, time.perf_counter() - start_time, "node_limit")
+            if (nodes & 1023) == 0 and time.perf_counter() - start_time > self.time_limit:
+                return SolverResult(None, 0, nodes, time.perf_counter() - start_time, "time_limit")
+
+            box_hash = state_hash ^ self.zobrist_player[player]
+            for box, d, new_boxes in self._pushes(player, boxes):
+                target = self.neighbors[box][d]
+                if self.deadlocks.is_deadlock_after_push(target, new_boxes.__contains__):
+                    continue
+                new_h = self.heuristic(new_boxes)
+                if new_h == INF:
+                    continue
+
+                new_player = min(self.reachable(box, new_boxes))
+                new_hash = box_hash ^ self.zobrist_box[box] ^ self.zobrist_box[target] ^ self.zobrist_player[new_player]
+                packed = self.codec.pack(new_boxes, new_player)
+                new_g = g + 1
+
+                found = table.find(new_hash, packed)
+                if found < 0:
+                    new_rid = table.add(new_hash, packed, new_g, min(new_h, 0xFFFF), rid, box, d)
+                elif table.get(found)[1] <= new_g:
+                    continue
+                else:
+                    new_rid = found
+                    table.update(found, new_g, rid, box, d)
+                heap.push(self._key(new_g, min(new_h, 0xFFFF), new_rid))
+
+        return SolverResult(None, 0, nodes, time.perf_counter() - start_time, "unsolvable")
+
+    def _build_compact_solution(self, table: StateTable, rid: int) -> str:
+        pushes = []
+        _, _, _, parent, box, d = table.get(rid)
+        while parent != NO_PARENT:
+            pushes.append((box, d))
+            _, _, _, parent, box, d = table.get(parent)
+        pushes.reverse()
+        return self._moves_for_pushes(pushes)
+
+def solve_level(level_data: str, max_nodes: int = 500000, time_limit: float = 30.0,
+                weight: float = 1.0, bidirectional: bool = False, compact: bool = False,
+                memory_cap=None, spill_dir=None) -> "SolverResult":
+    # compact: packed open/closed sets, spilled to disk past memory_cap bytes
+    if compact:
+        return CompactSolver(level_data, max_nodes, time_limit, weight, memory_cap, spill_dir).solve()
+    solver_class = BidirectionalSolver if bidirectional else Solver
+    return solver_class(level_data, max_nodes, time_limit, weight).solve()
+
+if __name__ == "__main__":
+    import sys
+    from level_loader import LevelLoader
+
+    loader = LevelLoader()
+    loader.load_levels()
+    data = loader.get_data()
+
+    # python solver.py [levelset] [level] [--bidirectional | --compact]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    levelset = args[0] if len(args) > 0 else "Microban1"
+    levelname = args[1] if len(args) > 1 else "Level 1"
+    result = solve_level(data[levelset][levelname], bidirectional="--bidirectional" in sys.argv,
+                         compact="--compact" in sys.argv)
+    print("{} {}: {} ({}) pushes={} nodes={} (backward {}) time={:.2f}s".format(
+        levelset, levelname, result.status, result.direction, result.pushes, result.nodes,
+        result.backward_nodes, result.elapsed))
+    if result.bytes_per_state:
+        print("{:.1f} bytes per state{}".format(result.bytes_per_state, ", spilled to disk" if result.spilled else ""))
+    if result.solution:
+        print(result.solution)
@@ -0,0 +1,35 @@
+# startup_profiler.py
+
+# Phase timings for --profile-startup. Phases may be recorded from worker
+# threads, so each one is stored with its own start offset and duration.
+
+import time
+import threading
+from contextlib import contextmanager
+
+class StartupProfiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.phases = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            t1 = time.perf_counter()
+            with self.lock:
+                self.phases.append((name, t0 - self.start, t1 - t0))
+
+    def report(self):
+        if not self.enabled:
+            return
+
+        total = time.perf_counter() - self.start
+        print("Startup profile ------------------------------")
+        for name, offset, duration in sorted(self.phases, key=lambda p: p[1]):
+            print("  {:<14} start {:8.1f} ms   took {:8.1f} ms".format(name, offset * 1000, duration * 1000))
+        print("  {:<14} {:8.1f} ms".format("first frame", total * 1000))
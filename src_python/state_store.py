@@ -0,0 +1,265 @@
+# state_store.py
+
+# Compact storage for long solver runs. A search state is packed into a fixed
+# number of bytes: the box positions as a bitset over the board cells, then
+# the normalized player cell as a u16. The closed set is an append-only array
+# of fixed-size records with an open addressing index over it, and the open
+# set is a binary heap of u64 keys. All three live in PackedArrays, which are
+# plain bytearrays until a shared MemoryBudget runs out and then move into
+# memory-mapped temp files, so a search can outgrow RAM instead of being
+# killed.
+#
+# record layout (little endian):
+#   u64 zobrist hash, u32 g, u16 h, u32 parent record, u16 box, u8 direction,
+#   then the packed state
+
+import mmap
+import struct
+import tempfile
+
+RECORD = struct.Struct("<QIHIHB")
+SLOT = struct.Struct("<I")
+HEAP_ITEM = struct.Struct("<Q")
+
+NO_PARENT = 0xFFFFFFFF
+
+class StateCodec:
+    def __init__(self, size: int):
+        self.size = size
+        self.bitset_bytes = (size + 7) // 8
+        self.state_bytes = self.bitset_bytes + 2
+
+    def pack(self, boxes, player: int) -> bytes:
+        bits = 0
+        for b in boxes:
+            bits |= 1 << b
+        return bits.to_bytes(self.bitset_bytes, "little") + player.to_bytes(2, "little")
+
+    def unpack(self, raw: bytes):
+        bits = int.from_bytes(raw[:self.bitset_bytes], "little")
+        boxes = []
+        while bits:
+            low = bits & -bits
+            boxes.append(low.bit_length() - 1)
+            bits ^= low
+        return frozenset(boxes), int.from_bytes(raw[self.bitset_bytes:], "little")
+
+class MemoryBudget:
+    # shared by every PackedArray of one search; cap_bytes=None never spills
+    def __init__(self, cap_bytes=None, spill_dir=None):
+        self.cap_bytes = cap_bytes
+        self.spill_dir = spill_dir
+        self.in_memory = 0
+        self.on_disk = 0
+
+    def reserve(self, nbytes: int) -> bool:
+        # False when nbytes more would pass the cap and should go to disk
+        if self.cap_bytes is not None and self.in_memory + nbytes > self.cap_bytes:
+            return False
+        self.in_memory += nbytes
+        return True
+
+class PackedArray:
+    # capacity fixed-size items in one buffer, accessed with struct
+    def __init__(self, item_size: int, capacity: int, budget: MemoryBudget):
+        self.item_size = item_size
+        self.capacity = capacity
+        self.budget = budget
+        self.file = None
+
+        nbytes = item_size * capacity
+        if budget.reserve(nbytes):
+            self.buf = bytearray(nbytes)
+        else:
+            budget.on_disk += nbytes
+            self.buf = self._map(nbytes)
+
+    def _map(self, nbytes: int):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile(prefix="sokoban-spill-", dir=self.budget.spill_dir)
+        self.file.truncate(nbytes)
+        return mmap.mmap(self.file.fileno(), nbytes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.item_size * self.capacity
+
+    @property
+    def spilled(self) -> bool:
+        return self.file is not None
+
+    def resize(self, capacity: int):
+        old_bytes = self.nbytes
+        new_bytes = self.item_size * capacity
+
+        if self.file is None and self.budget.reserve(new_bytes - old_bytes):
+            self.buf.extend(bytes(new_bytes - old_bytes))
+        elif self.file is None:
+            # over the cap: move the whole array to disk
+            self.budget.in_memory -= old_bytes
+            self.budget.on_disk += new_bytes
+            data = self.buf
+            self.buf = self._map(new_bytes)
+            self.buf[:old_bytes] = data
+        else:
+            self.budget.on_disk += new_bytes - old_bytes
+            self.buf.close()
+            self.buf = self._map(new_bytes)
+        self.capacity = capacity
+
+    def close(self):
+        if self.file is not None:
+            self.budget.on_disk -= self.nbytes
+            self.buf.close()
+            self.file.close()
+            self.file = None
+        else:
+            self.budget.in_memory -= self.nbytes
+        self.buf = bytearray()
+        self.capacity = 0
+
+class StateTable:
+    # closed set: state -> record id, with g, h and the push that reached it
+    def __init__(self, state_bytes: int, budget: MemoryBudget, capacity: int = 1 << 8):
+        self.state_bytes = state_bytes
+        self.record_size = RECORD.size + state_bytes
+        self.budget = budget
+        self.records = PackedArray(self.record_size, capacity, budget)
+        # slot values are record id + 1, 0 marks an empty slot
+        self.slots = PackedArray(SLOT.size, capacity * 2, budget)
+        self.mask = capacity * 2 - 1
+        self.count = 0
+
+    def find(self, state_hash: int, packed: bytes) -> int:
+        # record id, or -1
+        slots = self.slots.buf
+        records = self.records.buf
+        i = state_hash & self.mask
+        while True:
+            value = SLOT.unpack_from(slots, i * SLOT.size)[0]
+            if value == 0:
+                return -1
+            off = (value - 1) * self.record_size
+            if RECORD.unpack_from(records, off)[0] == state_hash and \
+                    records[off + RECORD.size:off + self.record_size] == packed:
+                return value - 1
+            i = (i + 1) & self.mask
+
+    def add(self, state_hash: int, packed: bytes, g: int, h: int, parent: int, box: int, d: int) -> int:
+        if self.count == self.records.capacity:
+            self.records.resize(self.records.capacity * 2)
+        if 2 * (self.count + 1) > self.mask + 1:
+            self._grow_index()
+
+        rid = self.count
+        off = rid * self.record_size
+        RECORD.pack_into(self.records.buf, off, state_hash, g, h, parent, box, d)
+        self.records.buf[off + RECORD.size:off + self.record_size] = packed
+        self._insert(state_hash, rid)
+        self.count += 1
+        return rid
+
+    def update(self, rid: int, g: int, parent: int, box: int, d: int):
+        # a cheaper path to a known state
+        off = rid * self.record_size
+        state_hash, _, h, _, _, _ = RECORD.unpack_from(self.records.buf, off)
+        RECORD.pack_into(self.records.buf, off, state_hash, g, h, parent, box, d)
+
+    def get(self, rid: int):
+        # (hash, g, h, parent, box, direction)
+        return RECORD.unpack_from(self.records.buf, rid * self.record_size)
+
+    def state(self, rid: int) -> bytes:
+        off = rid * self.record_size
+        return bytes(self.records.buf[off + RECORD.size:off + self.record_size])
+
+    def _insert(self, state_hash: int, rid: int):
+        slots = self.slots.buf
+        i = state_hash & self.mask
+        while SLOT.unpack_from(slots, i * SLOT.size)[0] != 0:
+            i = (i + 1) & self.mask
+        SLOT.pack_into(slots, i * SLOT.size, rid + 1)
+
+    def _grow_index(self):
+        num_slots = (self.mask + 1) * 2
+        self.slots.close()
+        self.slots = PackedArray(SLOT.size, num_slots, self.budget)
+        self.mask = num_slots - 1
+        for rid in range(self.count):
+            self._insert(RECORD.unpack_from(self.records.buf, rid * self.record_size)[0], rid)
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes + self.slots.nbytes
+
+    @property
+    def spilled(self) -> bool:
+        return self.records.spilled or self.slots.spilled
+
+    def close(self):
+        self.records.close()
+        self.slots.close()
+
+class PackedHeap:
+    # open set: min-heap of u64 keys
+    def __init__(self, budget: MemoryBudget, capacity: int = 1 << 8):
+        self.items = PackedArray(HEAP_ITEM.size, capacity, budget)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _get(self, i: int) -> int:
+        return HEAP_ITEM.unpack_from(self.items.buf, i * HEAP_ITEM.size)[0]
+
+    def _set(self, i: int, key: int):
+        HEAP_ITEM.pack_into(self.items.buf, i * HEAP_ITEM.size, key)
+
+    def push(self, key: int):
+        if self.size == self.items.capacity:
+            self.items.resize(self.items.capacity * 2)
+        i = self.size
+        self.size += 1
+        while i > 0:
+            parent = (i - 1) >> 1
+            parent_key = self._get(parent)
+            if parent_key <= key:
+                break
+            self._set(i, parent_key)
+            i = parent
+        self._set(i, key)
+
+    def pop(self) -> int:
+        top = self._get(0)
+        self.size -= 1
+        if self.size == 0:
+            return top
+
+        key = self._get(self.size)
+        i = 0
+        while True:
+            child = 2 * i + 1
+            if child >= self.size:
+                break
+            child_key = self._get(child)
+            if child + 1 < self.size:
+                right_key = self._get(child + 1)
+                if right_key < child_key:
+                    child, child_key = child + 1, right_key
+            if key <= child_key:
+                break
+            self._set(i, child_key)
+            i = child
+        self._set(i, key)
+        return top
+
+    @property
+    def nbytes(self) -> int:
+        return self.items.nbytes
+
+    @property
+    def spilled(self) -> bool:
+        return self.items.spilled
+
+    def close(self):
+        self.items.close()
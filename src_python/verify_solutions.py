@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# verify_solutions.py
+
+# Checks submitted solutions against the bundled (and imported) levels. Input
+# is JSONL with "levelset", "level" and "solution" keys (solver_results.jsonl
+# works as is) or CSV with the same columns. Every solution is replayed with
+# SokobanEngine.verify_solution(), so there is no history, redraw or logging,
+# on a process pool. Input is read in fixed-size windows of batches, which
+# keeps memory flat however large the file is, and results are written in
+# input order.
+#
+# usage: python verify_solutions.py INPUT [--out results.jsonl] [--workers N]
+#                                   [--batch-size N]
+#   INPUT "-" reads JSONL from stdin; an --out ending in .csv writes CSV
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from game_session import GameSession
+from level_loader import LevelLoader
+
+FIELDS = ("levelset", "level", "valid", "solved", "moves", "pushes", "error")
+
+session = None
+
+def init_worker():
+    # one session per worker; its engine cache keeps each level parsed once.
+    # Workers only read, so the metadata index is left to the game to save
+    global session
+    loader = LevelLoader(index_path=None)
+    loader.load_levels()
+    session = GameSession(loader.get_data())
+
+def verify_batch(records):
+    rows = []
+    for levelset, level, solution, error in records:
+        if error:
+            rows.append((levelset, level, False, False, 0, 0, error))
+            continue
+        try:
+            result = session.run_script(levelset, level, solution)
+        except Exception as e:
+            # one bad record must not take the pool (and the run) down
+            rows.append((levelset, level, False, False, 0, 0, "check failed: {!r}".format(e)))
+            continue
+        rows.append((levelset, level, result.valid, result.solved, result.moves, result.pushes, result.error))
+    return rows
+
+def read_records(f, fmt: str):
+    # yields (levelset, level, solution, error); a record that cannot be
+    # parsed comes out with an error and is reported, not fatal
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield "", "", "", "line {}: bad CSV: {}".format(reader.line_num, e)
+                continue
+            levelset, level = row.get("levelset"), row.get("level")
+            if not levelset or not level:
+                yield levelset or "", level or "", "", "line {}: missing levelset or level".format(reader.line_num)
+                continue
+            yield levelset, level, row.get("solution") or "", ""
+        return
+
+    for line_num, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            levelset, level = record["levelset"], record["level"]
+            solution = record.get("solution") or ""
+        except KeyError as e:
+            yield "", "", "", "line {}: missing {}".format(line_num, e)
+            continue
+        except (ValueError, TypeError, AttributeError) as e:
+            yield "", "", "", "line {}: bad record: {}".format(line_num, e)
+            continue
+
+        if not all(isinstance(value, str) for value in (levelset, level, solution)):
+            yield (levelset if isinstance(levelset, str) else "", level if isinstance(level, str) else "", "",
+                   "line {}: levelset, level and solution must be strings".format(line_num))
+            continue
+        yield levelset, level, solution, ""
+
+def iter_batches(records, batch_size: int):
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+class ResultWriter:
+    def __init__(self, f, fmt: str):
+        self.f = f
+        self.csv = csv.writer(f) if fmt == "csv" else None
+        if self.csv:
+            self.csv.writerow(FIELDS)
+
+    def write(self, row):
+        if self.csv:
+            self.csv.writerow(row)
+            return
+        record = dict(zip(FIELDS, row))
+        if not record["error"]:
+            del record["error"]
+        self.f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify LURD solutions against the level files.")
+    parser.add_argument("input", help="JSONL or CSV file of (levelset, level, solution), '-' for JSONL on stdin")
+    parser.add_argument("--out", default="-", help="results file, JSONL or .csv (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--batch-size", type=int, default=512, help="records per task")
+    args = parser.parse_args()
+
+    in_fmt = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+    out_fmt = "csv" if args.out.lower().endswith(".csv") else "jsonl"
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", newline="")
+    dst = sys.stdout if args.out == "-" else open(args.out, "w", newline="")
+    writer = ResultWriter(dst, out_fmt)
+
+    total = valid = solved = moves = 0
+    start = time.perf_counter()
+    try:
+        batches = iter_batches(read_records(src, in_fmt), args.batch_size)
+        with Pool(args.workers, initializer=init_worker) as pool:
+            # a few batches per worker in flight at a time; pool.imap would
+            # read the whole input ahead of the workers
+            window = max(1, args.workers) * 4
+            while True:
+                chunk = list(islice(batches, window))
+                if not chunk:
+                    break
+                for rows in pool.map(verify_batch, chunk, chunksize=1):
+                    for row in rows:
+                        writer.write(row)
+                        total += 1
+                        valid += row[2]
+                        solved += row[3]
+                        moves += row[4]
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    elapsed = time.perf_counter() - start
+    print("verify_solutions :: {} records, {} valid, {} solved, {} moves in {:.2f}s ({:.0f} moves/s)".format(
+        total, valid, solved, moves, elapsed, moves / elapsed if elapsed else 0), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()